@@ -3,16 +3,136 @@ Create sample F1 data for development when Ergast API is unavailable
 This creates realistic sample data to demonstrate the project functionality
 """
 
-import sqlite3
-import random
 from datetime import datetime, timedelta
 
-def create_sample_data():
-    """Create sample F1 data for project development"""
+import numpy as np
+
+from database_setup import DEFAULT_DB_PATH, use_db, create_schema, create_indexes
+
+# Driver-constructor pairings (realistic for 2024) - using IDs instead of strings
+DRIVER_TEAMS = {
+    1: 1,   # max_verstappen: red_bull
+    4: 1,   # perez: red_bull
+    2: 2,   # leclerc: ferrari 
+    3: 2,   # sainz: ferrari
+    6: 3,   # hamilton: mercedes
+    5: 3,   # russell: mercedes
+    7: 4,   # norris: mclaren
+    8: 4,   # piastri: mclaren
+    9: 5,   # alonso: aston_martin
+    10: 6   # ocon: alpine
+}
+
+# Points for finishing positions 1-20
+POINTS_SYSTEM = (25, 18, 15, 12, 10, 8, 6, 4, 2, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+
+RESULT_SQL = """
+    INSERT INTO race_results 
+    (race_id, driver_id, constructor_id, number, grid, position, position_text, 
+     position_order, points, laps, time_milliseconds, fastest_lap, fastest_lap_rank, 
+     fastest_lap_time, fastest_lap_speed, status_id) 
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# race_results indexes dropped before a bulk load of more rows than the threshold
+RESULT_INDEXES = ('idx_race_results_race_id', 'idx_rr_driver_cover', 'idx_rr_constructor_cover')
+INDEX_REBUILD_THRESHOLD = 1000
+
+# Keep rows * columns under SQLite's default 999 bound-parameter limit
+MAX_ROWS_PER_INSERT = 500
+
+def bulk_insert(cursor, table, columns, rows):
+    """Insert rows with multi-row INSERT statements, one per chunk"""
+    n = len(columns)
+    chunk_size = max(1, min(MAX_ROWS_PER_INSERT, 999 // n))
+    row_sql = "(" + ",".join("?" * n) + ")"
+    prefix = f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+    
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        params = [value for row in chunk for value in row]
+        cursor.execute(prefix + ",".join([row_sql] * len(chunk)), params)
+
+def iter_results(rng, races, driver_teams):
+    """Yield simulated race_results rows one at a time for executemany"""
+    driver_ids = list(driver_teams)
+    n = len(driver_ids)
+    for race in races:
+        race_id = race[0]
+        drivers_order = driver_ids.copy()
+        rng.shuffle(drivers_order)  # Random finishing order
+        
+        # Draw every random column for this race in one call each
+        numbers = rng.integers(1, 21, size=n).tolist()
+        grids = rng.integers(1, 11, size=n).tolist()
+        laps = rng.integers(50, 71, size=n).tolist()
+        fl_laps = rng.integers(10, 61, size=n).tolist()
+        fl_ranks = rng.integers(1, 11, size=n).tolist()
+        fl_minutes = rng.integers(1, 3, size=n).tolist()
+        fl_seconds = rng.integers(10, 31, size=n).tolist()
+        fl_millis = rng.integers(100, 1000, size=n).tolist()
+        fl_speeds = rng.uniform(200, 350, size=n).tolist()
+        has_fl_lap = (rng.random(n) > 0.3).tolist()
+        has_fl_rank = (rng.random(n) > 0.5).tolist()
+        has_fl_time = (rng.random(n) > 0.3).tolist()
+        has_fl_speed = (rng.random(n) > 0.3).tolist()
+        
+        # Simulate race time (winner gets actual time, others would have gap times)
+        winner_time_ms = int(rng.integers(5_400_000, 6_000_001))  # 1.5-1.67 hours in ms
+        
+        for i, driver_id in enumerate(drivers_order):
+            position = i + 1
+            yield (
+                race_id, driver_id, driver_teams[driver_id],
+                numbers[i],             # car number
+                grids[i],               # grid position
+                position,               # finishing position
+                str(position),          # position text
+                position,               # position order
+                POINTS_SYSTEM[position-1] if position <= 20 else 0,  # points scored
+                laps[i],                # laps completed
+                winner_time_ms if position == 1 else None,  # race time
+                fl_laps[i] if has_fl_lap[i] else None,      # fastest lap
+                fl_ranks[i] if has_fl_rank[i] else None,    # fastest lap rank
+                f"{fl_minutes[i]}:{fl_seconds[i]}.{fl_millis[i]}" if has_fl_time[i] else None,  # fastest lap time
+                fl_speeds[i] if has_fl_speed[i] else None,  # fastest lap speed
+                1  # status (finished)
+            )
+
+def create_sample_data(db_path=DEFAULT_DB_PATH, conn=None):
+    """Create sample F1 data for project development, on conn when given"""
+    
+    # One connection for the whole flow, so in-memory databases work too
+    with use_db(db_path, conn) as conn:
+        # Tables first; indexes are built after the rows are in
+        create_schema(conn=conn)
+        result_count, race_stats = load_sample_data(conn)
+        create_indexes(conn=conn)
+    
+    print("Sample data created successfully!")
+    print("Data includes:")
+    print("   - 10 circuits (Bahrain, Jeddah, Melbourne, etc.)")
+    print("   - 10 drivers (Verstappen, Leclerc, Hamilton, etc.)")
+    print("   - 10 constructors (Red Bull, Ferrari, Mercedes, etc.)")
+    print("   - 5 races from 2024 season")
+    print("   - Race results for all drivers")
     
-    conn = sqlite3.connect('data/f1_database.db')
+    # Show some statistics
+    print(f"\nDatabase Statistics:")
+    print(f"   - Total race results: {result_count}")
+    print(f"   - Races with data: {len(race_stats)}")
+
+def load_sample_data(conn):
+    """Replace the sample rows in one transaction and return (result_count, race_stats)"""
     cursor = conn.cursor()
     
+    # All sample inserts share one transaction, committed once at the end
+    cursor.execute("BEGIN")
+    
+    # Clear previous sample data (children before parents) so plain INSERTs can be used
+    for table in ('race_results', 'races', 'seasons', 'constructors', 'drivers', 'circuits'):
+        cursor.execute(f"DELETE FROM {table}")
+    
     print("Creating sample F1 data...")
     
     # Sample circuits - using individual INSERT statements to avoid datatype issues
@@ -29,10 +149,7 @@ def create_sample_data():
         (10, 'silverstone', 'Silverstone Circuit', 'Silverstone', 'UK', 52.0786, -1.01694, 153, 'http://en.wikipedia.org/wiki/Silverstone_Circuit')
     ]
     
-    cursor.executemany(
-        "INSERT OR REPLACE INTO circuits (circuit_id, circuit_ref, name, location, country, lat, lng, alt, url) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-        circuits_data
-    )
+    bulk_insert(cursor, 'circuits', ('circuit_id', 'circuit_ref', 'name', 'location', 'country', 'lat', 'lng', 'alt', 'url'), circuits_data)
     
     # Sample drivers
     drivers_data = [
@@ -48,10 +165,7 @@ def create_sample_data():
         (10, 'ocon', 31, 'OCO', 'Esteban', 'Ocon', '1996-09-17', 'French', 'http://en.wikipedia.org/wiki/Esteban_Ocon')
     ]
     
-    cursor.executemany(
-        "INSERT OR REPLACE INTO drivers (driver_id, driver_ref, number, code, forename, surname, dob, nationality, url) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-        drivers_data
-    )
+    bulk_insert(cursor, 'drivers', ('driver_id', 'driver_ref', 'number', 'code', 'forename', 'surname', 'dob', 'nationality', 'url'), drivers_data)
     
     # Sample constructors
     constructors_data = [
@@ -67,16 +181,13 @@ def create_sample_data():
         (10, 'haas', 'Haas Ferrari', 'American', 'http://en.wikipedia.org/wiki/Haas_F1_Team')
     ]
     
-    cursor.executemany(
-        "INSERT OR REPLACE INTO constructors (constructor_id, constructor_ref, name, nationality, url) VALUES (?, ?, ?, ?, ?)",
-        constructors_data
-    )
+    bulk_insert(cursor, 'constructors', ('constructor_id', 'constructor_ref', 'name', 'nationality', 'url'), constructors_data)
     
     # Sample seasons
     seasons_data = [(2023, 'http://en.wikipedia.org/wiki/2023_Formula_One_World_Championship'),
                    (2024, 'http://en.wikipedia.org/wiki/2024_Formula_One_World_Championship')]
     
-    cursor.executemany("INSERT OR REPLACE INTO seasons (year, url) VALUES (?, ?)", seasons_data)
+    bulk_insert(cursor, 'seasons', ('year', 'url'), seasons_data)
     
     # Sample races for 2024
     races_data = [
@@ -87,97 +198,29 @@ def create_sample_data():
         (5, 2024, 5, 5, 'Miami Grand Prix', '2024-05-05', '20:30:00', 'https://en.wikipedia.org/wiki/2024_Miami_Grand_Prix')
     ]
     
-    cursor.executemany(
-        "INSERT OR REPLACE INTO races (race_id, year, round, circuit_id, name, date, time, url) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-        races_data
-    )
+    bulk_insert(cursor, 'races', ('race_id', 'year', 'round', 'circuit_id', 'name', 'date', 'time', 'url'), races_data)
     
     # Create sample race results
     print("Generating race results...")
     
-    # Driver-constructor pairings (realistic for 2024) - using IDs instead of strings
-    driver_teams = {
-        1: 1,   # max_verstappen: red_bull
-        4: 1,   # perez: red_bull
-        2: 2,   # leclerc: ferrari 
-        3: 2,   # sainz: ferrari
-        6: 3,   # hamilton: mercedes
-        5: 3,   # russell: mercedes
-        7: 4,   # norris: mclaren
-        8: 4,   # piastri: mclaren
-        9: 5,   # alonso: aston_martin
-        10: 6   # ocon: alpine
-    }
-    
-    # Generate results for each race
-    for race_id, year, round_num, circuit_id, race_name, date, time, url in races_data:
-        drivers_list = list(driver_teams.keys())
-        random.shuffle(drivers_list)  # Random finishing order
-        
-        for position, driver_id in enumerate(drivers_list, 1):
-            constructor_id = driver_teams[driver_id]
-            
-            # Simulate realistic results
-            points_system = [25, 18, 15, 12, 10, 8, 6, 4, 2, 1] + [0] * 10
-            points = points_system[position-1] if position <= len(points_system) else 0
-            
-            # Simulate race time (winner gets actual time, others get gaps)
-            if position == 1:
-                race_time_ms = random.randint(5400000, 6000000)  # 1.5-1.67 hours in ms
-            else:
-                race_time_ms = None  # Others would have gap times
-            
-            result_data = (
-                race_id, driver_id, constructor_id, 
-                random.randint(1, 20),  # car number
-                random.randint(1, 10),   # grid position
-                position,                # finishing position
-                str(position),          # position text
-                position,               # position order
-                points,                 # points scored
-                random.randint(50, 70), # laps completed
-                race_time_ms,           # race time
-                random.randint(10, 60) if random.random() > 0.3 else None,  # fastest lap
-                random.randint(1, 10) if random.random() > 0.5 else None,   # fastest lap rank
-                f"{random.randint(1, 2)}:{random.randint(10, 30)}.{random.randint(100, 999)}" if random.random() > 0.3 else None,  # fastest lap time
-                random.uniform(200, 350) if random.random() > 0.3 else None,  # fastest lap speed
-                1  # status (finished)
-            )
-            
-            cursor.execute("""
-                INSERT OR REPLACE INTO race_results 
-                (race_id, driver_id, constructor_id, number, grid, position, position_text, 
-                 position_order, points, laps, time_milliseconds, fastest_lap, fastest_lap_rank, 
-                 fastest_lap_time, fastest_lap_speed, status_id) 
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, result_data)
+    # Large loads skip per-row index maintenance; create_indexes() rebuilds them afterwards
+    if len(races_data) * len(DRIVER_TEAMS) > INDEX_REBUILD_THRESHOLD:
+        for index in RESULT_INDEXES:
+            cursor.execute(f"DROP INDEX IF EXISTS {index}")
     
-    conn.commit()
-    conn.close()
-    
-    print("Sample data created successfully!")
-    print("Data includes:")
-    print("   - 10 circuits (Bahrain, Jeddah, Melbourne, etc.)")
-    print("   - 10 drivers (Verstappen, Leclerc, Hamilton, etc.)")
-    print("   - 10 constructors (Red Bull, Ferrari, Mercedes, etc.)")
-    print("   - 5 races from 2024 season")
-    print("   - Race results for all drivers")
-    
-    # Show some statistics
-    conn = sqlite3.connect('data/f1_database.db')
-    cursor = conn.cursor()
+    # Generate results for each race, streamed straight into the insert
+    rng = np.random.default_rng()
+    conn.executemany(RESULT_SQL, iter_results(rng, races_data, DRIVER_TEAMS))
     
+    # Gather statistics inside the load transaction
     cursor.execute("SELECT COUNT(*) FROM race_results")
     result_count = cursor.fetchone()[0]
     
     cursor.execute("SELECT name, COUNT(*) as races FROM races JOIN race_results ON races.race_id = race_results.race_id GROUP BY name")
     race_stats = cursor.fetchall()
     
-    print(f"\nDatabase Statistics:")
-    print(f"   - Total race results: {result_count}")
-    print(f"   - Races with data: {len(race_stats)}")
-    
-    conn.close()
+    conn.commit()
+    return result_count, race_stats
 
 if __name__ == "__main__":
     create_sample_data()
\ No newline at end of file
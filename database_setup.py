@@ -1,20 +1,66 @@
 """
 Database setup script for F1 Analytics project
 Creates SQLite database and tables from schema
+
+Setup runs in two steps: create_schema() builds the tables and seeds the
+status lookup, create_indexes() builds the secondary indexes. Bulk loaders
+should call create_schema(), insert their rows, then call create_indexes()
+so the inserts don't pay per-row index maintenance.
+
+Every step takes either a db_path or an open conn. An in-memory database
+only lives as long as its connection, so pass the same conn to each step.
 """
 
 import sqlite3
 import os
+from contextlib import contextmanager
+
+# Connection-level tuning applied to every connection opened by the setup scripts
+PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA cache_size=-64000;
+PRAGMA mmap_size=268435456;
+"""
+
+DEFAULT_DB_PATH = 'data/f1_database.db'
+
+def open_db(path=DEFAULT_DB_PATH):
+    """
+    Open a SQLite connection with WAL journaling and a larger page cache
+    path may also be a 'file:' URI such as 'file::memory:?cache=shared'; ':memory:'
+    works too, but the database disappears when this connection is closed
+    """
+    conn = sqlite3.connect(path, uri=path.startswith('file:'))
+    conn.executescript(PRAGMAS)
+    return conn
+
+@contextmanager
+def use_db(db_path=DEFAULT_DB_PATH, conn=None):
+    """Yield conn when given, leaving it open; otherwise open db_path and close it afterwards"""
+    if conn is not None:
+        yield conn
+        return
 
-def create_database():
+    # ensure that data directory exists (in-memory and URI databases have none)
+    data_dir = os.path.dirname(db_path)
+    if data_dir and not db_path.startswith('file:') and not os.path.exists(data_dir):
+        os.makedirs(data_dir)
 
-    # ensure that data directory exists
-    if not os.path.exists('data'):
-        os.makedirs('data')
+    conn = open_db(db_path)
+    try:
+        yield conn
+    finally:
+        conn.close()
 
-    # connect to SQLite database
-    conn = sqlite3.connect('data/f1_database.db')
-    cursor = conn.cursor()
+def create_schema(db_path=DEFAULT_DB_PATH, conn=None):
+    """Create all tables and seed the status lookup, without secondary indexes"""
+    with use_db(db_path, conn) as conn:
+        _create_schema(conn)
+
+def _create_schema(conn):
+    """Run the schema script and status seed on an open connection"""
 
     # reading and executing schema
     schema_sql = """
@@ -23,46 +69,46 @@ def create_database():
     -- Drivers Table
     CREATE TABLE IF NOT EXISTS drivers (
         driver_id INTEGER PRIMARY KEY,
-        driver_ref VARCHAR(30) UNIQUE NOT NULL,
+        driver_ref TEXT UNIQUE NOT NULL,
         number INTEGER,
-        code VARCHAR(3),
-        forename VARCHAR(50) NOT NULL,
-        surname VARCHAR(50) NOT NULL,
-        dob DATE,
-        nationality VARCHAR(50),
-        url VARCHAR(255),
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
+        code TEXT,
+        forename TEXT NOT NULL,
+        surname TEXT NOT NULL,
+        dob TEXT,
+        nationality TEXT,
+        url TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    ) STRICT;
 
     -- Constructors Table
     CREATE TABLE IF NOT EXISTS constructors (
         constructor_id INTEGER PRIMARY KEY,
-        constructor_ref VARCHAR(30) UNIQUE NOT NULL,
-        name VARCHAR(100) NOT NULL,
-        nationality VARCHAR(50),
-        url VARCHAR(255),
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
+        constructor_ref TEXT UNIQUE NOT NULL,
+        name TEXT NOT NULL,
+        nationality TEXT,
+        url TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    ) STRICT;
 
     -- Circuits Table
     CREATE TABLE IF NOT EXISTS circuits (
         circuit_id INTEGER PRIMARY KEY,
-        circuit_ref VARCHAR(30) UNIQUE NOT NULL,
-        name VARCHAR(100) NOT NULL,
-        location VARCHAR(100),
-        country VARCHAR(50),
-        lat DECIMAL(10, 6),
-        lng DECIMAL(10, 6),
+        circuit_ref TEXT UNIQUE NOT NULL,
+        name TEXT NOT NULL,
+        location TEXT,
+        country TEXT,
+        lat REAL,
+        lng REAL,
         alt INTEGER,
-        url VARCHAR(255),
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
+        url TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    ) STRICT;
 
     -- Seasons Table
     CREATE TABLE IF NOT EXISTS seasons (
         year INTEGER PRIMARY KEY,
-        url VARCHAR(255)
-    );
+        url TEXT
+    ) STRICT;
 
     -- Race Table
     CREATE TABLE IF NOT EXISTS races (
@@ -70,25 +116,25 @@ def create_database():
         year INTEGER NOT NULL,
         round INTEGER NOT NULL,
         circuit_id INTEGER NOT NULL,
-        name VARCHAR(100) NOT NULL,
-        date DATE NOT NULL,
-        time TIME,
-        url VARCHAR(255),
-        fp1_date DATE,
-        fp1_time TIME,
-        fp2_date DATE,
-        fp2_time TIME,
-        fp3_date DATE,
-        fp3_time TIME,
-        quali_date DATE,
-        quali_time TIME,
-        sprint_date DATE,
-        sprint_time TIME,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        name TEXT NOT NULL,
+        date TEXT NOT NULL,
+        time TEXT,
+        url TEXT,
+        fp1_date TEXT,
+        fp1_time TEXT,
+        fp2_date TEXT,
+        fp2_time TEXT,
+        fp3_date TEXT,
+        fp3_time TEXT,
+        quali_date TEXT,
+        quali_time TEXT,
+        sprint_date TEXT,
+        sprint_time TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
         FOREIGN KEY (year) REFERENCES seasons(year),
         FOREIGN KEY (circuit_id) REFERENCES circuits(circuit_id),
         UNIQUE(year, round)
-    );
+    ) STRICT;
 
     -- Race Results Table
     CREATE TABLE IF NOT EXISTS race_results (
@@ -99,22 +145,22 @@ def create_database():
         number INTEGER,
         grid INTEGER,
         position INTEGER,
-        position_text VARCHAR(10),
+        position_text TEXT,
         position_order INTEGER,
-        points DECIMAL(8,2) DEFAULT 0,
+        points REAL DEFAULT 0,
         laps INTEGER,
         time_milliseconds INTEGER,
         fastest_lap INTEGER,
         fastest_lap_rank INTEGER,
-        fastest_lap_time VARCHAR(20),
-        fastest_lap_speed DECIMAL(6,3),
+        fastest_lap_time TEXT,
+        fastest_lap_speed REAL,
         status_id INTEGER,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
         FOREIGN KEY (race_id) REFERENCES races(race_id),
         FOREIGN KEY (driver_id) REFERENCES drivers(driver_id),
         FOREIGN KEY (constructor_id) REFERENCES constructors(constructor_id),
         UNIQUE(race_id, driver_id)
-    );
+    ) STRICT;
 
     -- Qualifying Results Table
     CREATE TABLE IF NOT EXISTS qualifying_results (
@@ -124,54 +170,54 @@ def create_database():
         constructor_id INTEGER NOT NULL,
         number INTEGER,
         position INTEGER,
-        q1_time VARCHAR(20),
+        q1_time TEXT,
         q1_milliseconds INTEGER,
-        q2_time VARCHAR(20),
+        q2_time TEXT,
         q2_milliseconds INTEGER,
-        q3_time VARCHAR(20),
+        q3_time TEXT,
         q3_milliseconds INTEGER,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
         FOREIGN KEY (race_id) REFERENCES races(race_id),
         FOREIGN KEY (driver_id) REFERENCES drivers(driver_id),
         FOREIGN KEY (constructor_id) REFERENCES constructors(constructor_id),
         UNIQUE(race_id, driver_id)
-    );
+    ) STRICT;
 
     -- Driver standings table
     CREATE TABLE IF NOT EXISTS driver_standings (
         standing_id INTEGER PRIMARY KEY,
         race_id INTEGER NOT NULL,
         driver_id INTEGER NOT NULL,
-        points DECIMAL(8,2) DEFAULT 0,
+        points REAL DEFAULT 0,
         position INTEGER,
-        position_text VARCHAR(10),
+        position_text TEXT,
         wins INTEGER DEFAULT 0,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
         FOREIGN KEY (race_id) REFERENCES races(race_id),
         FOREIGN KEY (driver_id) REFERENCES drivers(driver_id),
         UNIQUE(race_id, driver_id)
-    );
+    ) STRICT;
 
     -- Constructor standings table
     CREATE TABLE IF NOT EXISTS constructor_standings (
         standing_id INTEGER PRIMARY KEY,
         race_id INTEGER NOT NULL,
         constructor_id INTEGER NOT NULL,
-        points DECIMAL(8,2) DEFAULT 0,
+        points REAL DEFAULT 0,
         position INTEGER,
-        position_text VARCHAR(10),
+        position_text TEXT,
         wins INTEGER DEFAULT 0,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
         FOREIGN KEY (race_id) REFERENCES races(race_id),
         FOREIGN KEY (constructor_id) REFERENCES constructors(constructor_id),
         UNIQUE(race_id, constructor_id)
-    );
+    ) STRICT;
     
     -- Status table
     CREATE TABLE IF NOT EXISTS status (
         status_id INTEGER PRIMARY KEY,
-        status VARCHAR(50) UNIQUE NOT NULL
-    );
+        status TEXT UNIQUE NOT NULL
+    ) STRICT;
     
     -- Lap times table
     CREATE TABLE IF NOT EXISTS lap_times (
@@ -180,13 +226,13 @@ def create_database():
         driver_id INTEGER NOT NULL,
         lap INTEGER NOT NULL,
         position INTEGER,
-        time_string VARCHAR(20),
+        time_string TEXT,
         milliseconds INTEGER,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
         FOREIGN KEY (race_id) REFERENCES races(race_id),
         FOREIGN KEY (driver_id) REFERENCES drivers(driver_id),
         UNIQUE(race_id, driver_id, lap)
-    );
+    ) STRICT;
     
     -- Pit stops table
     CREATE TABLE IF NOT EXISTS pit_stops (
@@ -195,19 +241,42 @@ def create_database():
         driver_id INTEGER NOT NULL,
         stop INTEGER NOT NULL,
         lap INTEGER NOT NULL,
-        time_string VARCHAR(20),
-        duration_string VARCHAR(20),
+        time_string TEXT,
+        duration_string TEXT,
         duration_milliseconds INTEGER,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
         FOREIGN KEY (race_id) REFERENCES races(race_id),
         FOREIGN KEY (driver_id) REFERENCES drivers(driver_id),
         UNIQUE(race_id, driver_id, stop)
-    );
+    ) STRICT;
+
+    -- Championship standings views
+    CREATE VIEW IF NOT EXISTS v_driver_standings AS
+    SELECT
+        driver_id,
+        SUM(points) AS total_points,
+        COUNT(*) AS races_completed,
+        AVG(position) AS avg_position
+    FROM race_results
+    GROUP BY driver_id;
+
+    CREATE VIEW IF NOT EXISTS v_constructor_standings AS
+    SELECT
+        constructor_id,
+        SUM(points) AS total_points,
+        COUNT(DISTINCT driver_id) AS drivers_count,
+        AVG(position) AS avg_position
+    FROM race_results
+    GROUP BY constructor_id;
 
     """
 
+    # STRICT tables need SQLite 3.37+; older builds fall back to type affinity
+    if sqlite3.sqlite_version_info < (3, 37, 0):
+        schema_sql = schema_sql.replace(") STRICT;", ");")
+
     # Execute schema
-    cursor.executescript(schema_sql)
+    conn.executescript(schema_sql)
 
     # Insert initial status values
     status_values = [
@@ -218,36 +287,47 @@ def create_database():
         (17, 'Radiator'), (18, 'Suspension'), (19, 'Brakes'), (20, 'Differential')
     ]
 
-    cursor.executemany(
+    conn.executemany(
         "INSERT OR IGNORE INTO status (status_id, status) VALUES (?, ?);", 
         status_values
     )
 
+    conn.commit()
+
+def create_indexes(db_path=DEFAULT_DB_PATH, conn=None):
+    """Create secondary indexes, meant to run after bulk data is loaded"""
     indexes = [
+        # idx_rr_driver_cover leads with driver_id and supersedes the old single-column index
+        "DROP INDEX IF EXISTS idx_race_results_driver_id",
         "CREATE INDEX IF NOT EXISTS idx_race_results_race_id ON race_results(race_id)",
-        "CREATE INDEX IF NOT EXISTS idx_race_results_driver_id ON race_results(driver_id)",
+        "CREATE INDEX IF NOT EXISTS idx_rr_driver_cover ON race_results(driver_id, points, position, race_id)",
+        "CREATE INDEX IF NOT EXISTS idx_rr_constructor_cover ON race_results(constructor_id, points, position, driver_id)",
         "CREATE INDEX IF NOT EXISTS idx_qualifying_results_race_id ON qualifying_results(race_id)",
         "CREATE INDEX IF NOT EXISTS idx_driver_standings_race_id ON driver_standings(race_id)",
         "CREATE INDEX IF NOT EXISTS idx_races_year ON races(year)",
+        "CREATE INDEX IF NOT EXISTS idx_races_circuit_id ON races(circuit_id)",
         "CREATE INDEX IF NOT EXISTS idx_races_date ON races(date)"
     ]
 
-    for index in indexes:
-        cursor.execute(index)
+    with use_db(db_path, conn) as conn:
+        for index in indexes:
+            conn.execute(index)
+        conn.commit()
 
-    conn.commit()
-    conn.close()
-
-    print("Database and tables created successfully.")
-    print("Location: data/f1_database.db")
-
-    # Display table content
-    conn = sqlite3.connect('data/f1_database.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-    tables = cursor.fetchall()
-    print(f"📊 Created {len(tables)} tables: {', '.join([t[0] for t in tables])}")
-    conn.close()
+def create_database(db_path=DEFAULT_DB_PATH, conn=None):
+    """Create the full database on one connection: schema first, then indexes"""
+    with use_db(db_path, conn) as conn:
+        create_schema(conn=conn)
+        create_indexes(conn=conn)
+
+        print("Database and tables created successfully.")
+        print(f"Location: {db_path}")
+
+        # Display table content
+        cursor = conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        tables = cursor.fetchall()
+        print(f"📊 Created {len(tables)} tables: {', '.join([t[0] for t in tables])}")
 
 
 if __name__ == "__main__":
@@ -2,13 +2,37 @@
 Simple data exploration script to verify F1 database is working
 """
 
-import sqlite3
-import pandas as pd
+from database_setup import DEFAULT_DB_PATH, use_db
 
-def explore_f1_data():
-    """Explore the F1 database and show basic statistics"""
+def format_value(value):
+    """Format a single cell for display"""
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+def print_table(columns, rows):
+    """Print a small result set as aligned text columns"""
+    cells = [[format_value(v) for v in row] for row in rows]
+    widths = [max([len(col)] + [len(row[i]) for row in cells]) for i, col in enumerate(columns)]
+    for row in [columns] + cells:
+        print("  ".join(cell.ljust(w) for cell, w in zip(row, widths)).rstrip())
+
+def explore_f1_data(db_path=DEFAULT_DB_PATH, conn=None):
+    """Explore the F1 database (or an open conn) and show basic statistics"""
     
-    conn = sqlite3.connect('data/f1_database.db')
+    with use_db(db_path, conn) as db:
+        # Only a connection opened here is made read-only; a caller's conn is left as it was
+        if conn is None:
+            db.execute("PRAGMA query_only=ON")
+        _explore(db.cursor())
+    
+    print("\n✅ Data exploration complete!")
+    print("🚀 Ready to build analytics and dashboard!")
+
+def _explore(cursor):
+    """Print table counts, standings and race winners"""
     
     print("🏁 F1 Data Explorer")
     print("=" * 50)
@@ -16,9 +40,9 @@ def explore_f1_data():
     # Show table contents
     tables = ['circuits', 'drivers', 'constructors', 'races', 'race_results']
     
-    for table in tables:
-        query = f"SELECT COUNT(*) FROM {table}"
-        count = pd.read_sql_query(query, conn).iloc[0, 0]
+    query = "SELECT " + ", ".join(f"(SELECT COUNT(*) FROM {table})" for table in tables)
+    counts = cursor.execute(query).fetchone()
+    for table, count in zip(tables, counts):
         print(f"📊 {table.capitalize()}: {count} records")
     
     print("\n" + "=" * 50)
@@ -27,19 +51,19 @@ def explore_f1_data():
     query = """
     SELECT 
         d.forename || ' ' || d.surname as driver_name,
-        SUM(rr.points) as total_points,
-        COUNT(rr.race_id) as races_completed,
-        AVG(rr.position) as avg_position
-    FROM race_results rr
-    JOIN drivers d ON rr.driver_id = d.driver_id
-    GROUP BY rr.driver_id, d.forename, d.surname
-    ORDER BY total_points DESC
+        s.total_points,
+        s.races_completed,
+        s.avg_position
+    FROM v_driver_standings s
+    JOIN drivers d USING (driver_id)
+    ORDER BY s.total_points DESC
     LIMIT 10
     """
     
-    df = pd.read_sql_query(query, conn)
+    rows = cursor.execute(query).fetchall()
+    columns = [d[0] for d in cursor.description]
     print("🏆 Driver Championship Standings:")
-    print(df.to_string(index=False))
+    print_table(columns, rows)
     
     print("\n" + "=" * 50)
     
@@ -47,19 +71,19 @@ def explore_f1_data():
     query = """
     SELECT 
         c.name as constructor_name,
-        SUM(rr.points) as total_points,
-        COUNT(DISTINCT rr.driver_id) as drivers_count,
-        AVG(rr.position) as avg_position
-    FROM race_results rr
-    JOIN constructors c ON rr.constructor_id = c.constructor_id
-    GROUP BY rr.constructor_id, c.name
-    ORDER BY total_points DESC
+        s.total_points,
+        s.drivers_count,
+        s.avg_position
+    FROM v_constructor_standings s
+    JOIN constructors c USING (constructor_id)
+    ORDER BY s.total_points DESC
     LIMIT 10
     """
     
-    df = pd.read_sql_query(query, conn)
+    rows = cursor.execute(query).fetchall()
+    columns = [d[0] for d in cursor.description]
     print("🏭 Constructor Championship Standings:")
-    print(df.to_string(index=False))
+    print_table(columns, rows)
     
     print("\n" + "=" * 50)
     
@@ -78,13 +102,10 @@ def explore_f1_data():
     ORDER BY r.round
     """
     
-    df = pd.read_sql_query(query, conn)
+    rows = cursor.execute(query).fetchall()
+    columns = [d[0] for d in cursor.description]
     print("🥇 Race Winners:")
-    print(df.to_string(index=False))
-    
-    conn.close()
-    print("\n✅ Data exploration complete!")
-    print("🚀 Ready to build analytics and dashboard!")
+    print_table(columns, rows)
 
 if __name__ == "__main__":
     explore_f1_data()
\ No newline at end of file
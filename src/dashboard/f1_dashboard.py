@@ -5,6 +5,7 @@ Interactive Streamlit dashboard for F1 data analysis
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import sqlite3
@@ -23,32 +24,94 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize analytics
-@st.cache_data
+def to_arrow_dtypes(df):
+    """Convert a frame to Arrow-backed dtypes, which pickle smaller in st.cache_data"""
+    return df.convert_dtypes(dtype_backend='pyarrow')
+
+# Initialize analytics once per server process
+@st.cache_resource
 def load_analytics():
-    """Load analytics data with caching"""
+    """Load the shared analytics object"""
     analytics = F1Analytics('data/f1_database.db')
     return analytics
 
+@st.cache_data(ttl=3600, show_spinner=False)
 def load_driver_performance():
-    """Load driver performance data"""
+    """Load driver performance data rounded for display, indexed by driver name for fast selection"""
+    analytics = load_analytics()
+    return to_arrow_dtypes(analytics.get_driver_performance_metrics().round(2)).set_index('driver_name')
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_driver_ids():
+    """Map driver name to driver_id, as plain ints so they bind as SQL parameters"""
+    driver_df = load_driver_performance()
+    return dict(zip(driver_df.index, driver_df['driver_id'].tolist()))
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_overview_kpis():
+    """Load headline season counts"""
+    analytics = load_analytics()
+    return analytics.get_overview_kpis()
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_top_drivers(n=10):
+    """Load the top n drivers by points"""
     analytics = load_analytics()
-    return analytics.get_driver_performance_metrics()
+    return to_arrow_dtypes(analytics.get_top_drivers(n))
 
+@st.cache_data(ttl=3600, show_spinner=False)
 def load_constructor_performance():
-    """Load constructor performance data"""
+    """Load constructor performance data rounded for display"""
     analytics = load_analytics()
-    return analytics.get_constructor_performance()
+    return to_arrow_dtypes(analytics.get_constructor_performance().round(2))
 
+@st.cache_data(ttl=3600, show_spinner=False)
 def load_championship_progression():
-    """Load championship progression data"""
+    """Load championship progression data, indexed by driver name for fast selection"""
     analytics = load_analytics()
-    return analytics.get_championship_progression()
+    return to_arrow_dtypes(analytics.get_championship_progression()).set_index('driver_name')
 
+@st.cache_data(ttl=3600, show_spinner=False)
 def load_circuit_performance():
-    """Load circuit performance data"""
+    """Load circuit performance data, indexed by circuit name for fast selection"""
+    analytics = load_analytics()
+    return to_arrow_dtypes(analytics.get_circuit_performance()).set_index('circuit_name')
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_head_to_head(driver1_id, driver2_id):
+    """Load head-to-head comparison data for two drivers"""
     analytics = load_analytics()
-    return analytics.get_circuit_performance()
+    return analytics.get_head_to_head_comparison(driver1_id, driver2_id)
+
+# Line traces longer than this are downsampled before being sent to the browser
+MAX_POINTS_PER_TRACE = 2000
+
+def downsample_lttb(x, y, threshold=MAX_POINTS_PER_TRACE):
+    """Downsample a line with Largest-Triangle-Three-Buckets, keeping its visual shape"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n <= threshold or threshold < 3:
+        return x, y
+    
+    # First and last points are always kept; the rest are split into threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    keep = np.empty(threshold, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        
+        # Keep the point forming the largest triangle with the previous pick and the next bucket's average
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    
+    return x[keep], y[keep]
 
 # Main dashboard
 def main():
@@ -80,25 +143,24 @@ def show_overview():
     st.header("📊 Season Overview")
     
     # Load data
-    driver_df = load_driver_performance()
+    kpis = load_overview_kpis()
+    top_drivers_df = load_top_drivers(10)
     constructor_df = load_constructor_performance()
     
     # Key metrics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Drivers", len(driver_df))
+        st.metric("Total Drivers", kpis['total_drivers'])
     
     with col2:
-        st.metric("Total Constructors", len(constructor_df))
+        st.metric("Total Constructors", kpis['total_constructors'])
     
     with col3:
-        total_races = driver_df['races_completed'].iloc[0] if not driver_df.empty else 0
-        st.metric("Races Completed", total_races)
+        st.metric("Races Completed", kpis['races_completed'])
     
     with col4:
-        total_wins = driver_df['wins'].sum()
-        st.metric("Total Wins", total_wins)
+        st.metric("Total Wins", kpis['total_wins'] or 0)
     
     # Championship standings
     col1, col2 = st.columns(2)
@@ -107,14 +169,14 @@ def show_overview():
         st.subheader("🏆 Driver Championship")
         
         fig = px.bar(
-            driver_df.head(10),
+            top_drivers_df,
             x='driver_name',
             y='total_points',
             color='total_points',
             title="Top 10 Drivers by Points"
         )
         fig.update_xaxes(tickangle=45)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig, use_container_width=True, key='top_drivers')
     
     with col2:
         st.subheader("🏭 Constructor Championship")
@@ -127,7 +189,45 @@ def show_overview():
             title="Constructor Standings"
         )
         fig.update_xaxes(tickangle=45)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig, use_container_width=True, key='constructor_standings')
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def build_driver_figures(selected_drivers):
+    """Build the driver comparison figures for a selection, cached as plain dicts"""
+    filtered_df = load_driver_performance().loc[list(selected_drivers)].reset_index()
+    
+    scatter_fig = px.scatter(
+        filtered_df,
+        x='avg_position',
+        y='total_points',
+        size='races_completed',
+        hover_data=['driver_name', 'podiums', 'wins'],
+        title="Driver Performance Scatter",
+        render_mode='webgl'
+    )
+    scatter_fig.update_xaxes(autorange="reversed")  # Lower position is better
+    
+    rate_fig = px.scatter(
+        filtered_df,
+        x='podium_rate',
+        y='win_rate',
+        size='total_points',
+        hover_data=['driver_name', 'races_completed'],
+        title="Success Rate Analysis",
+        render_mode='webgl'
+    )
+    
+    consistency_fig = px.bar(
+        filtered_df.sort_values('position_consistency'),
+        x='driver_name',
+        y='position_consistency',
+        title="Position Consistency (Lower is Better)",
+        color='position_consistency',
+        color_continuous_scale='RdYlGn_r'
+    )
+    consistency_fig.update_xaxes(tickangle=45)
+    
+    return scatter_fig.to_dict(), rate_fig.to_dict(), consistency_fig.to_dict()
 
 def show_driver_performance():
     """Display driver performance analysis"""
@@ -138,53 +238,29 @@ def show_driver_performance():
     # Driver selector
     selected_drivers = st.multiselect(
         "Select Drivers to Compare",
-        driver_df['driver_name'].tolist(),
-        default=driver_df['driver_name'].head(5).tolist()
+        driver_df.index.tolist(),
+        default=driver_df.index[:5].tolist()
     )
     
     if selected_drivers:
-        filtered_df = driver_df[driver_df['driver_name'].isin(selected_drivers)]
+        filtered_df = driver_df.loc[selected_drivers].reset_index()
+        
+        scatter_fig, rate_fig, consistency_fig = build_driver_figures(tuple(selected_drivers))
         
         # Performance metrics
         col1, col2 = st.columns(2)
         
         with col1:
             st.subheader("Points vs Average Position")
-            fig = px.scatter(
-                filtered_df,
-                x='avg_position',
-                y='total_points',
-                size='races_completed',
-                hover_data=['driver_name', 'podiums', 'wins'],
-                title="Driver Performance Scatter"
-            )
-            fig.update_xaxes(autorange="reversed")  # Lower position is better
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(scatter_fig, use_container_width=True, key='driver_scatter')
         
         with col2:
             st.subheader("Podium Rate vs Win Rate")
-            fig = px.scatter(
-                filtered_df,
-                x='podium_rate',
-                y='win_rate',
-                size='total_points',
-                hover_data=['driver_name', 'races_completed'],
-                title="Success Rate Analysis"
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(rate_fig, use_container_width=True, key='driver_rates')
         
         # Performance consistency
         st.subheader("Performance Consistency")
-        fig = px.bar(
-            filtered_df.sort_values('position_consistency'),
-            x='driver_name',
-            y='position_consistency',
-            title="Position Consistency (Lower is Better)",
-            color='position_consistency',
-            color_continuous_scale='RdYlGn_r'
-        )
-        fig.update_xaxes(tickangle=45)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(consistency_fig, use_container_width=True, key='driver_consistency')
         
         # Detailed metrics table
         st.subheader("Detailed Performance Metrics")
@@ -193,7 +269,7 @@ def show_driver_performance():
             'wins', 'podiums', 'podium_rate', 'win_rate', 'position_consistency'
         ]
         st.dataframe(
-            filtered_df[display_columns].round(2),
+            filtered_df[display_columns],
             use_container_width=True
         )
 
@@ -214,7 +290,7 @@ def show_constructor_analysis():
             names='constructor_name',
             title="Points Share by Constructor"
         )
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig, use_container_width=True, key='constructor_share')
     
     with col2:
         st.subheader("Average Position by Constructor")
@@ -227,7 +303,7 @@ def show_constructor_analysis():
             color_continuous_scale='RdYlGn_r'
         )
         fig.update_xaxes(tickangle=45)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig, use_container_width=True, key='constructor_avg_position')
     
     # Performance comparison
     st.subheader("Constructor Performance Matrix")
@@ -237,10 +313,11 @@ def show_constructor_analysis():
         y='total_points',
         size='podiums',
         hover_data=['constructor_name', 'wins', 'podium_rate'],
-        title="Constructor Performance Overview"
+        title="Constructor Performance Overview",
+        render_mode='webgl'
     )
     fig.update_xaxes(autorange="reversed")
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(fig, use_container_width=True, key='constructor_matrix')
     
     # Constructor table
     st.subheader("Constructor Standings Table")
@@ -249,10 +326,50 @@ def show_constructor_analysis():
         'wins', 'podiums', 'podium_rate', 'win_rate'
     ]
     st.dataframe(
-        constructor_df[display_columns].round(2),
+        constructor_df[display_columns],
         use_container_width=True
     )
 
+@st.cache_data(ttl=3600, show_spinner=False)
+def top_progression_drivers(n=8):
+    """Return the n drivers with the most championship points, cached alongside the progression data"""
+    progression_df = load_championship_progression()
+    max_points = progression_df['cumulative_points'].groupby(level='driver_name', sort=False).max()
+    return max_points.nlargest(n).index.tolist()
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def build_progression_figures(selected_drivers):
+    """Build the progression and race-by-race figures for a selection, cached as plain dicts"""
+    filtered_df = load_championship_progression().loc[list(selected_drivers)].reset_index()
+    
+    # One WebGL trace per driver; browsers allow only ~8-16 WebGL contexts,
+    # so each page keeps its WebGL traces on a single figure
+    progression_fig = go.Figure()
+    for driver_name, driver_df in filtered_df.groupby('driver_name', sort=False):
+        x, y = downsample_lttb(driver_df['round'], driver_df['cumulative_points'])
+        progression_fig.add_trace(go.Scattergl(
+            x=x,
+            y=y,
+            mode='lines+markers',
+            name=driver_name
+        ))
+    progression_fig.update_layout(
+        title="Championship Points Progression",
+        xaxis_title="Race Round",
+        yaxis_title="Cumulative Points"
+    )
+    
+    race_points_fig = px.bar(
+        filtered_df,
+        x='round',
+        y='race_points',
+        color='driver_name',
+        title="Points Scored per Race",
+        barmode='group'
+    )
+    
+    return progression_fig.to_dict(), race_points_fig.to_dict()
+
 def show_championship_progression():
     """Display championship progression"""
     st.header("🏆 Championship Progression")
@@ -261,7 +378,7 @@ def show_championship_progression():
     
     if not progression_df.empty:
         # Top drivers selector
-        top_drivers = progression_df.groupby('driver_name')['cumulative_points'].max().sort_values(ascending=False).head(8).index.tolist()
+        top_drivers = top_progression_drivers()
         
         selected_drivers = st.multiselect(
             "Select Drivers to Track",
@@ -270,36 +387,14 @@ def show_championship_progression():
         )
         
         if selected_drivers:
-            filtered_df = progression_df[progression_df['driver_name'].isin(selected_drivers)]
+            progression_fig, race_points_fig = build_progression_figures(tuple(selected_drivers))
             
             # Championship progression line chart
-            fig = px.line(
-                filtered_df,
-                x='round',
-                y='cumulative_points',
-                color='driver_name',
-                title="Championship Points Progression",
-                markers=True
-            )
-            fig.update_layout(
-                xaxis_title="Race Round",
-                yaxis_title="Cumulative Points"
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(progression_fig, use_container_width=True, key='progression')
             
             # Race-by-race points
             st.subheader("Race-by-Race Points")
-            race_points_df = filtered_df.pivot(index='round', columns='driver_name', values='race_points').fillna(0)
-            
-            fig = px.bar(
-                race_points_df.reset_index().melt(id_vars='round'),
-                x='round',
-                y='value',
-                color='driver_name',
-                title="Points Scored per Race",
-                barmode='group'
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(race_points_fig, use_container_width=True, key='race_points')
 
 def show_circuit_analysis():
     """Display circuit analysis"""
@@ -311,12 +406,12 @@ def show_circuit_analysis():
         # Circuit selector
         selected_circuits = st.multiselect(
             "Select Circuits",
-            circuit_df['circuit_name'].tolist(),
-            default=circuit_df['circuit_name'].head(5).tolist()
+            circuit_df.index.tolist(),
+            default=circuit_df.index[:5].tolist()
         )
         
         if selected_circuits:
-            filtered_df = circuit_df[circuit_df['circuit_name'].isin(selected_circuits)]
+            filtered_df = circuit_df.loc[selected_circuits].reset_index()
             
             # Circuit statistics
             col1, col2 = st.columns(2)
@@ -331,7 +426,7 @@ def show_circuit_analysis():
                     title="Driver Success at Circuits"
                 )
                 fig.update_xaxes(tickangle=45)
-                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(fig, use_container_width=True, key='circuit_driver_wins')
             
             with col2:
                 st.subheader("Constructor Success by Circuit")
@@ -343,7 +438,7 @@ def show_circuit_analysis():
                     title="Constructor Success at Circuits"
                 )
                 fig.update_xaxes(tickangle=45)
-                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(fig, use_container_width=True, key='circuit_constructor_wins')
             
             # Circuit details table
             st.subheader("Circuit Performance Details")
@@ -360,23 +455,23 @@ def show_head_to_head():
     """Display head-to-head comparison"""
     st.header("⚔️ Head-to-Head Driver Comparison")
     
-    driver_df = load_driver_performance()
-    analytics = load_analytics()
+    driver_ids = load_driver_ids()
+    driver_names = list(driver_ids)
     
     # Driver selectors
     col1, col2 = st.columns(2)
     
     with col1:
-        driver1 = st.selectbox("Select Driver 1", driver_df['driver_name'].tolist(), index=0)
-        driver1_id = driver_df[driver_df['driver_name'] == driver1]['driver_id'].iloc[0]
+        driver1 = st.selectbox("Select Driver 1", driver_names, index=0)
+        driver1_id = driver_ids[driver1]
     
     with col2:
-        driver2 = st.selectbox("Select Driver 2", driver_df['driver_name'].tolist(), index=1)
-        driver2_id = driver_df[driver_df['driver_name'] == driver2]['driver_id'].iloc[0]
+        driver2 = st.selectbox("Select Driver 2", driver_names, index=1)
+        driver2_id = driver_ids[driver2]
     
     if driver1 != driver2:
         # Get head-to-head data
-        h2h_df, h2h_stats = analytics.get_head_to_head_comparison(driver1_id, driver2_id)
+        h2h_df, h2h_stats = load_head_to_head(driver1_id, driver2_id)
         
         if h2h_stats and h2h_stats['total_races'] > 0:
             # H2H Statistics
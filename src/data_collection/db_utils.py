@@ -0,0 +1,23 @@
+"""
+Shared SQLite helpers for the data collectors
+"""
+
+import pandas as pd
+
+def bindable_rows(df):
+    """
+    iterate a frame's rows as tuples that sqlite3 can bind
+    datetime columns become 'YYYY-MM-DD HH:MM:SS' strings, timedelta columns total seconds,
+    and missing values None; other object columns must already hold bindable values
+    """
+    missing = df.isna()
+    converted = {}
+    for col, dtype in df.dtypes.items():
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            converted[col] = df[col].astype(str)
+        elif pd.api.types.is_timedelta64_dtype(dtype):
+            converted[col] = df[col].dt.total_seconds()
+    if converted:
+        df = df.assign(**converted)
+    # object dtype turns numpy scalars into types sqlite3 can bind
+    return df.astype(object).where(~missing, None).itertuples(index=False, name=None)
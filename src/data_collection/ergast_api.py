@@ -4,43 +4,203 @@ Handles data collection from Ergast Developer API
 API Documentation: https://ergast.com/mrd/
 """
 
+import ijson
+import orjson
+import pandas as pd
 import requests
+import requests_cache
 import time
 import json
 import sqlite3
-from datetime import datetime
+import threading
+import urllib3
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from datetime import datetime, timedelta
 import os
+import re
+
+from db_utils import bindable_rows
+
+# [hours:]minutes:seconds[.milliseconds]
+_TIME_RE = re.compile(r'(?:(\d+):)?(\d+):(\d+)(?:\.(\d+))?')
+
+# Flattened Ergast result fields read by get_race_results
+_RESULT_FIELDS = [
+    'number', 'grid', 'position', 'positionText', 'points', 'laps', 'status',
+    'Driver.driverId', 'Constructor.constructorId', 'Time.time',
+    'FastestLap.lap', 'FastestLap.rank', 'FastestLap.Time.time', 'FastestLap.AverageSpeed.speed'
+]
+
+# Ergast status text to status_id, matching the status table seeded by database_setup
+STATUS_MAP = {
+    'Finished': 1, 'Disqualified': 2, 'Accident': 3, 'Collision': 4,
+    'Engine': 5, 'Gearbox': 6, 'Transmission': 7, 'Clutch': 8,
+    'Hydraulics': 9, 'Electrical': 10, '+1 Lap': 11, '+2 Laps': 12,
+    '+3 Laps': 13, '+4 Laps': 14, '+5 Laps': 15, 'Spun off': 16,
+    'Radiator': 17, 'Suspension': 18, 'Brakes': 19, 'Differential': 20
+}
+
+# Ergast pages listings (30 rows by default); 1000 is the largest page it serves
+PAGE_SIZE = 1000
+
+def _collect_mrdata(events, meta):
+    """ pass ijson parse events through, copying top-level MRData scalars into meta """
+    for prefix, event, value in events:
+        if prefix.startswith('MRData.') and prefix.count('.') == 1 and event in ('string', 'number'):
+            meta[prefix[len('MRData.'):]] = value
+        yield prefix, event, value
+
+# Conflict target used when saving each table, its natural key; the *_ref columns are
+# UNIQUE, so a row already loaded under another id (e.g. sample data) is updated, not duplicated
+PK_MAP = {
+    'seasons': ('year',),
+    'circuits': ('circuit_ref',),
+    'drivers': ('driver_ref',),
+    'constructors': ('constructor_ref',),
+    'races': ('year', 'round'),
+    'race_results': ('race_id', 'driver_id'),
+    'qualifying_results': ('race_id', 'driver_id'),
+}
+
+# Primary keys that an upsert leaves alone, since other tables reference them
+ID_COLUMNS = {
+    'circuits': 'circuit_id',
+    'drivers': 'driver_id',
+    'constructors': 'constructor_id',
+    'races': 'race_id',
+}
+
+# Ergast identifies rows by text ids ('max_verstappen', '2024_1'); the database keys them by
+# INTEGER PRIMARY KEY rowids, so each id column is translated with a (text id, rowid) query on save
+REF_KEYS = {
+    'circuit_id': "SELECT circuit_ref, circuit_id FROM circuits",
+    'driver_id': "SELECT driver_ref, driver_id FROM drivers",
+    'constructor_id': "SELECT constructor_ref, constructor_id FROM constructors",
+    'race_id': "SELECT year || '_' || round, race_id FROM races",
+}
+
+def _strip_utc(time_str):
+    """ drop the trailing 'Z' from an Ergast UTC time, None when missing """
+    return time_str.replace('Z', '') if time_str else None
+
+@lru_cache(maxsize=None)
+def _insert_sql(table_name, columns):
+    """ build the upsert statement for a table and column tuple once """
+    placeholders = ','.join(['?' for _ in columns])
+    column_names = ','.join(columns)
+    sql = f"INSERT INTO {table_name} ({column_names}) VALUES ({placeholders})"
+    conflict_columns = PK_MAP.get(table_name)
+    if not conflict_columns:
+        return sql
+    # Update conflicting rows in place; INSERT OR REPLACE would delete and re-insert them
+    keep = set(conflict_columns) | {ID_COLUMNS.get(table_name)}
+    updates = ','.join(f"{col}=excluded.{col}" for col in columns if col not in keep)
+    action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+    return f"{sql} ON CONFLICT({','.join(conflict_columns)}) {action}"
 
 class ErgastClient:
     """ Client for fetching data """
     
-    def __init__(self, db_path='data/f1_database.db'):
+    def __init__(self, db_path='data/f1_database.db', cache_path='data/http_cache.sqlite'):
         self.base_url = 'https://ergast.com/api/f1'
         self.db_path = db_path
-        self.session = requests.Session()
-        self.request_delay = 0.5 # allows for 0.5 seconds between requests
+        # responses are cached locally and revalidated with ETag/Last-Modified once stale
+        self.session = requests_cache.CachedSession(
+            cache_path,
+            backend='sqlite',
+            expire_after=timedelta(days=30),
+            cache_control=True
+        )
+        # listings are parsed straight off the socket, which the cache session can't do
+        # since it reads the whole body to store it; they always go to the network
+        self.stream_session = requests.Session()
+        self.requests_per_second = 4 # Ergast's burst limit
+        self.max_workers = 8 # concurrent requests when fanning out race results
+        self._rate_lock = threading.Lock()
+        # start times of the most recent live requests, oldest first
+        self._request_times = deque(maxlen=self.requests_per_second)
+
+        # one long-lived connection tuned for bulk loading
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(
+            "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA temp_store=MEMORY;"
+        )
 
-    def _make_request(self, endpoint):
+    def _wait_for_slot(self):
+        """ block only when requests_per_second live requests already started within the last second """
+        with self._rate_lock:
+            now = time.monotonic()
+            start = now
+            if len(self._request_times) == self._request_times.maxlen:
+                start = max(now, self._request_times[0] + 1.0)
+            self._request_times.append(start)
+        if start > now:
+            time.sleep(start - now)
+
+    def _make_request(self, endpoint, expire_after=None):
         """ make a request to the ergast API with error handling """
         url = f"{self.base_url}/{endpoint}.json"
 
         try:
-            time.sleep(self.request_delay)
-            response = self.session.get(url, timeout=30)
+            # cache hits skip the rate limit; a 504 means the URL is not cached yet
+            response = self.session.get(url, only_if_cached=True, expire_after=expire_after)
+            if response.status_code == 504:
+                self._wait_for_slot()
+                response = self.session.get(url, timeout=30, expire_after=expire_after)
             response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return orjson.loads(response.content)
+        except (requests.RequestException, orjson.JSONDecodeError) as e:
             print(f"Error fetching data from {url}: {e}")
             return None
+
+    def _open_stream(self, url):
+        """ open a streamed GET response whose raw body is decoded as it is read """
+        self._wait_for_slot()
+        response = self.stream_session.get(url, stream=True, timeout=30)
+        response.raise_for_status()
+        response.raw.decode_content = True
+        return response
+
+    def _stream_items(self, endpoint, prefix, meta=None):
+        """
+        yield the records under prefix one at a time, without building the whole response
+        endpoint may carry a query string; MRData scalars such as 'total' are copied into meta when given
+        request and parse errors propagate, so callers can tell a failed fetch from an empty one
+        """
+        with self._open_stream(f"{self.base_url}/{endpoint}") as response:
+            events = ijson.parse(response.raw)
+            if meta is not None:
+                events = _collect_mrdata(events, meta)
+            yield from ijson.items(events, prefix)
+
+    def _fetch_page(self, endpoint, prefix, offset):
+        """ fetch one page of records, returning the reported total alongside them """
+        meta = {}
+        items = list(self._stream_items(f"{endpoint}.json?limit={PAGE_SIZE}&offset={offset}", prefix, meta=meta))
+        return int(meta.get('total', 0)), items
+
+    def _fetch_all_items(self, endpoint, prefix):
+        """
+        fetch every page of a listing endpoint; pages after the first are requested concurrently
+        returns an empty list if any page fails, rather than a partial listing
+        """
+        try:
+            total, items = self._fetch_page(endpoint, prefix, 0)
+            offsets = range(PAGE_SIZE, total, PAGE_SIZE)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                for _, page in pool.map(lambda offset: self._fetch_page(endpoint, prefix, offset), offsets):
+                    items.extend(page)
+        except (requests.RequestException, urllib3.exceptions.HTTPError, ijson.JSONError) as e:
+            print(f"Error fetching {endpoint}: {e}")
+            return []
+        return items
         
     def get_seasons(self, start_year=2000, end_year=datetime.now().year):
         """ Fetch seasons from start_year to end_year """
         seasons = []
-        data = self._make_request(f"seasons")
-        if not data:
-            return []
-        
-        for season in data['MRData']['SeasonTable']['Seasons']:
+        for season in self._fetch_all_items("seasons", 'MRData.SeasonTable.Seasons.item'):
             year = int(season['season'])
             if start_year <= year <= end_year:
                 seasons.append({
@@ -55,14 +215,9 @@ class ErgastClient:
         """Fetch all circuits"""
         print("Fetching circuits...")
         
-        data = self._make_request("circuits")
-        if not data:
-            return []
-        
         circuits = []
-        for circuit in data['MRData']['CircuitTable']['Circuits']:
+        for circuit in self._fetch_all_items("circuits", 'MRData.CircuitTable.Circuits.item'):
             circuits.append({
-                'circuit_id': circuit['circuitId'],
                 'circuit_ref': circuit['circuitId'],
                 'name': circuit['circuitName'],
                 'location': circuit['Location']['locality'],
@@ -80,14 +235,9 @@ class ErgastClient:
         """Fetch all drivers"""
         print("Fetching drivers...")
         
-        data = self._make_request("drivers")
-        if not data:
-            return []
-        
         drivers = []
-        for driver in data['MRData']['DriverTable']['Drivers']:
+        for driver in self._fetch_all_items("drivers", 'MRData.DriverTable.Drivers.item'):
             drivers.append({
-                'driver_id': driver['driverId'],
                 'driver_ref': driver['driverId'],
                 'number': int(driver['permanentNumber']) if driver.get('permanentNumber') else None,
                 'code': driver.get('code', None),
@@ -105,14 +255,9 @@ class ErgastClient:
         """Fetch all constructors"""
         print("Fetching constructors...")
         
-        data = self._make_request("constructors")
-        if not data:
-            return []
-        
         constructors = []
-        for constructor in data['MRData']['ConstructorTable']['Constructors']:
+        for constructor in self._fetch_all_items("constructors", 'MRData.ConstructorTable.Constructors.item'):
             constructors.append({
-                'constructor_id': constructor['constructorId'],
                 'constructor_ref': constructor['constructorId'],
                 'name': constructor['name'],
                 'nationality': constructor.get('nationality'),
@@ -132,26 +277,31 @@ class ErgastClient:
         
         races = []
         for race in data['MRData']['RaceTable']['Races']:
+            # Practice and qualifying sessions, looked up once per race
+            fp1 = race.get('FirstPractice') or {}
+            fp2 = race.get('SecondPractice') or {}
+            fp3 = race.get('ThirdPractice') or {}
+            quali = race.get('Qualifying') or {}
+            sprint = race.get('Sprint') or {}
+            
             races.append({
-                'race_id': f"{year}_{race['round']}",
                 'year': year,
                 'round': int(race['round']),
                 'circuit_id': race['Circuit']['circuitId'],
                 'name': race['raceName'],
                 'date': race['date'],
-                'time': race.get('time', '').replace('Z', '') if race.get('time') else None,
+                'time': _strip_utc(race.get('time')),
                 'url': race.get('url', ''),
-                # Practice and qualifying sessions
-                'fp1_date': race.get('FirstPractice', {}).get('date'),
-                'fp1_time': race.get('FirstPractice', {}).get('time', '').replace('Z', '') if race.get('FirstPractice', {}).get('time') else None,
-                'fp2_date': race.get('SecondPractice', {}).get('date'),
-                'fp2_time': race.get('SecondPractice', {}).get('time', '').replace('Z', '') if race.get('SecondPractice', {}).get('time') else None,
-                'fp3_date': race.get('ThirdPractice', {}).get('date'),
-                'fp3_time': race.get('ThirdPractice', {}).get('time', '').replace('Z', '') if race.get('ThirdPractice', {}).get('time') else None,
-                'quali_date': race.get('Qualifying', {}).get('date'),
-                'quali_time': race.get('Qualifying', {}).get('time', '').replace('Z', '') if race.get('Qualifying', {}).get('time') else None,
-                'sprint_date': race.get('Sprint', {}).get('date'),
-                'sprint_time': race.get('Sprint', {}).get('time', '').replace('Z', '') if race.get('Sprint', {}).get('time') else None,
+                'fp1_date': fp1.get('date'),
+                'fp1_time': _strip_utc(fp1.get('time')),
+                'fp2_date': fp2.get('date'),
+                'fp2_time': _strip_utc(fp2.get('time')),
+                'fp3_date': fp3.get('date'),
+                'fp3_time': _strip_utc(fp3.get('time')),
+                'quali_date': quali.get('date'),
+                'quali_time': _strip_utc(quali.get('time')),
+                'sprint_date': sprint.get('date'),
+                'sprint_time': _strip_utc(sprint.get('time')),
             })
         
         print(f"Found {len(races)} races for {year}")
@@ -159,111 +309,95 @@ class ErgastClient:
     
     def get_race_results(self, year, round_num):
         """Fetch race results for a specific race"""
-        data = self._make_request(f"{year}/{round_num}/results")
+        # results of completed seasons never change
+        expire_after = requests_cache.NEVER_EXPIRE if year < datetime.now().year else None
+        data = self._make_request(f"{year}/{round_num}/results", expire_after=expire_after)
         if not data:
-            return []
+            return pd.DataFrame()
         
-        results = []
         race_data = data['MRData']['RaceTable']['Races']
         if not race_data:
-            return []
+            return pd.DataFrame()
         
-        race_id = f"{year}_{round_num}"
+        # Flatten the nested JSON into columns, e.g. 'FastestLap.Time.time'
+        df = pd.json_normalize(race_data[0]['Results']).reindex(columns=_RESULT_FIELDS)
         
-        for result in race_data[0]['Results']:
-            # Handle time - could be race time or gap
-            time_ms = None
-            if result.get('Time'):
-                # This is race time for winner, convert to milliseconds
-                time_str = result['Time']['time']
-                time_ms = self._time_to_milliseconds(time_str)
-            
-            results.append({
-                'race_id': race_id,
-                'driver_id': result['Driver']['driverId'],
-                'constructor_id': result['Constructor']['constructorId'],
-                'number': int(result.get('number', 0)) if result.get('number') else None,
-                'grid': int(result['grid']) if result['grid'].isdigit() else None,
-                'position': int(result['position']) if result['position'].isdigit() else None,
-                'position_text': result['position'],
-                'position_order': int(result['positionText']) if result['positionText'].isdigit() else 999,
-                'points': float(result['points']),
-                'laps': int(result['laps']),
-                'time_milliseconds': time_ms,
-                'fastest_lap': int(result.get('FastestLap', {}).get('lap', 0)) if result.get('FastestLap', {}).get('lap') else None,
-                'fastest_lap_rank': int(result.get('FastestLap', {}).get('rank', 0)) if result.get('FastestLap', {}).get('rank') else None,
-                'fastest_lap_time': result.get('FastestLap', {}).get('Time', {}).get('time'),
-                'fastest_lap_speed': float(result.get('FastestLap', {}).get('AverageSpeed', {}).get('speed', 0)) if result.get('FastestLap', {}).get('AverageSpeed', {}).get('speed') else None,
-                'status_id': self._get_status_id(result['status'])
-            })
+        def to_int(col):
+            return pd.to_numeric(df[col], errors='coerce').astype('Int64')
+        
+        results = pd.DataFrame({
+            'race_id': f"{year}_{round_num}",
+            'driver_id': df['Driver.driverId'],
+            'constructor_id': df['Constructor.constructorId'],
+            'number': to_int('number'),
+            'grid': to_int('grid'),
+            'position': to_int('position'),
+            'position_text': df['position'],
+            'position_order': to_int('positionText').fillna(999),
+            'points': pd.to_numeric(df['points'], errors='coerce').astype(float),
+            'laps': to_int('laps'),
+            # Only the winner has a race time; the rest are gaps
+            'time_milliseconds': df['Time.time'].map(self._time_to_milliseconds, na_action='ignore').astype('Int64'),
+            'fastest_lap': to_int('FastestLap.lap'),
+            'fastest_lap_rank': to_int('FastestLap.rank'),
+            'fastest_lap_time': df['FastestLap.Time.time'],
+            'fastest_lap_speed': pd.to_numeric(df['FastestLap.AverageSpeed.speed'], errors='coerce'),
+            # Unknown statuses default to 'Finished'
+            'status_id': df['status'].map(STATUS_MAP).fillna(1).astype('int16')
+        })
         
         return results
     
+    def get_race_results_for_races(self, races):
+        """Fetch results for many (year, round) pairs concurrently, in input order"""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(lambda race: self.get_race_results(*race), races))
+    
     def _time_to_milliseconds(self, time_str):
-        """Convert time string like '1:34:50.616' to milliseconds"""
-        try:
-            parts = time_str.split(':')
-            if len(parts) == 3:  # hours:minutes:seconds.milliseconds
-                hours = int(parts[0])
-                minutes = int(parts[1])
-                seconds_parts = parts[2].split('.')
-                seconds = int(seconds_parts[0])
-                milliseconds = int(seconds_parts[1]) if len(seconds_parts) > 1 else 0
-                
-                total_ms = (hours * 3600 + minutes * 60 + seconds) * 1000 + milliseconds
-                return total_ms
-            elif len(parts) == 2:  # minutes:seconds.milliseconds
-                minutes = int(parts[0])
-                seconds_parts = parts[1].split('.')
-                seconds = int(seconds_parts[0])
-                milliseconds = int(seconds_parts[1]) if len(seconds_parts) > 1 else 0
-                
-                total_ms = (minutes * 60 + seconds) * 1000 + milliseconds
-                return total_ms
-        except:
-            pass
-        return None
+        """Convert time string like '1:34:50.616' or '1:32.608' to milliseconds"""
+        match = _TIME_RE.fullmatch(time_str) if time_str else None
+        if not match:
+            return None
+        hours, minutes, seconds, milliseconds = match.groups()
+        return (int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)) * 1000 + int(milliseconds or 0)
     
-    def _get_status_id(self, status_text):
-        """Map status text to status ID"""
-        status_map = {
-            'Finished': 1, 'Disqualified': 2, 'Accident': 3, 'Collision': 4,
-            'Engine': 5, 'Gearbox': 6, 'Transmission': 7, 'Clutch': 8,
-            'Hydraulics': 9, 'Electrical': 10, '+1 Lap': 11, '+2 Laps': 12,
-            '+3 Laps': 13, '+4 Laps': 14, '+5 Laps': 15, 'Spun off': 16,
-            'Radiator': 17, 'Suspension': 18, 'Brakes': 19, 'Differential': 20
-        }
-        return status_map.get(status_text, 1)  # Default to 'Finished'
+    def _ref_ids(self, column):
+        """ map the Ergast text ids of an id column to the integer keys already in the database """
+        return dict(self.conn.execute(REF_KEYS[column]).fetchall())
     
     def save_to_database(self, table_name, data):
-        """Save data to SQLite database"""
-        if not data:
+        """Save data to SQLite database, translating Ergast text ids to integer keys"""
+        if data is None or len(data) == 0:
             return
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Get column names from first record
-        columns = list(data[0].keys())
-        placeholders = ','.join(['?' for _ in columns])
-        column_names = ','.join(columns)
-        
-        # Prepare data for insertion
-        values = []
-        for record in data:
-            values.append([record.get(col) for col in columns])
+        # Get column names from the frame or the first record
+        columns = tuple(data.columns) if isinstance(data, pd.DataFrame) else tuple(data[0].keys())
         
         try:
-            cursor.executemany(
-                f"INSERT OR REPLACE INTO {table_name} ({column_names}) VALUES ({placeholders})",
-                values
-            )
-            conn.commit()
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                # ids are looked up inside the transaction, so a failed lookup is reported like any save error
+                ref_ids = {col: self._ref_ids(col) for col in columns if col in REF_KEYS}
+                if isinstance(data, pd.DataFrame):
+                    values = bindable_rows(data.assign(**{
+                        col: data[col].map(ids).astype('Int64') for col, ids in ref_ids.items()
+                    }))
+                else:
+                    # Rows are produced lazily while executemany consumes them
+                    values = (
+                        tuple(ref_ids[col].get(record.get(col)) if col in ref_ids else record.get(col) for col in columns)
+                        for record in data
+                    )
+                self.conn.executemany(_insert_sql(table_name, columns), values)
             print(f"Saved {len(data)} records to {table_name}")
         except sqlite3.Error as e:
             print(f"Error saving to {table_name}: {e}")
-        finally:
-            conn.close()
+    
+    def close(self):
+        """Close the database connection and HTTP session"""
+        self.conn.close()
+        self.session.close()
+        self.stream_session.close()
 
 def main():
     """Main function to demonstrate usage"""
@@ -286,17 +420,19 @@ def main():
     client.save_to_database('seasons', seasons)
     
     # Fetch races for recent seasons
+    race_keys = []
     for season in seasons[-2:]:  # Last 2 seasons for demo
         year = season['year']
         races = client.get_races_for_season(year)
         client.save_to_database('races', races)
-        
-        # Fetch race results for each race
-        for race in races[:3]:  # First 3 races per season for demo
-            results = client.get_race_results(year, race['round'])
-            if results:
-                client.save_to_database('race_results', results)
+        race_keys.extend((year, race['round']) for race in races[:3])  # First 3 races per season for demo
+    
+    # Fetch race results for all races concurrently
+    for results in client.get_race_results_for_races(race_keys):
+        if not results.empty:
+            client.save_to_database('race_results', results)
     
+    client.close()
     print("Data collection complete!")
 
 if __name__ == "__main__":
@@ -4,16 +4,153 @@ Collects detailed F1 data using the Fast-F1 library.
 Includes lap times, telemetry, weather, and session data
 """
 
-import fastf1
 import pandas as pd
 import sqlite3
 import numpy as np
 import warnings
 from datetime import datetime, timedelta
 import os
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-warnings.filterwarnings("ignore")
+from db_utils import bindable_rows
+
+# FastF1 (and everything it pulls in) is imported on first use, see _import_fastf1
+_fastf1 = None
+
+def _import_fastf1():
+    """ import FastF1 once, silencing the warnings it emits """
+    global _fastf1
+    if _fastf1 is None:
+        import fastf1
+        warnings.filterwarnings("ignore", module="fastf1")
+        _fastf1 = fastf1
+    return _fastf1
+
+# journal_mode=WAL persists in the database file, so it is set once in _configure_db
+WAL_PRAGMA = "PRAGMA journal_mode=WAL"
+
+# These apply per connection and are set on every save connection
+CONNECTION_PRAGMAS = """
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA cache_size=-65536;
+"""
+
+# Enhanced tables, created once when the collector starts
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS enhanced_lap_times (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        race_id TEXT,
+        driver_code TEXT,
+        driver_number INTEGER,
+        lap_number INTEGER,
+        lap_time_seconds REAL,
+        sector1_time_seconds REAL,
+        sector2_time_seconds REAL,
+        sector3_time_seconds REAL,
+        speed_i1 REAL,
+        speed_i2 REAL,
+        speed_fl REAL,
+        speed_st REAL,
+        is_personal_best BOOLEAN,
+        compound TEXT,
+        tyre_life INTEGER,
+        track_status TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS enhanced_weather (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        race_id TEXT,
+        session_type TEXT,
+        time_stamp TEXT,
+        air_temp REAL,
+        humidity REAL,
+        pressure REAL,
+        rainfall REAL,
+        track_temp REAL,
+        wind_direction REAL,
+        wind_speed REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS enhanced_race_results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        race_id TEXT,
+        driver_code TEXT,
+        driver_number INTEGER,
+        position INTEGER,
+        points REAL,
+        grid_position INTEGER,
+        race_time_seconds REAL,
+        status TEXT,
+        team_name TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """
+]
+
+# Rows converted and inserted per executemany, bounding the temporary copies
+CHUNK_SIZE = 10_000
+
+# FastF1 source columns the extractors keep; everything else is dropped at the session boundary
+_WANTED_LAP_COLS = [
+    'Driver', 'DriverNumber', 'LapNumber', 'LapTime', 'Sector1Time', 'Sector2Time', 'Sector3Time',
+    'SpeedI1', 'SpeedI2', 'SpeedFL', 'SpeedST', 'IsPersonalBest', 'Compound', 'TyreLife', 'TrackStatus'
+]
+_WANTED_RESULT_COLS = [
+    'Abbreviation', 'DriverNumber', 'Position', 'Points', 'GridPosition', 'Time', 'Status', 'TeamName'
+]
+_WANTED_WEATHER_COLS = [
+    'Time', 'AirTemp', 'Humidity', 'Pressure', 'Rainfall', 'TrackTemp', 'WindDirection', 'WindSpeed'
+]
+
+def _project(df, wanted):
+    """ narrow a session frame to the wanted columns it actually has """
+    return df[[col for col in wanted if col in df.columns]]
+
+# FastF1 frame columns mapped to the columns of the enhanced tables they're saved to
+LAP_COLUMNS = {
+    'race_id': 'race_id', 'driver_code': 'driver_code', 'driver_number': 'driver_number',
+    'LapNumber': 'lap_number', 'LapTime_seconds': 'lap_time_seconds',
+    'Sector1Time_seconds': 'sector1_time_seconds', 'Sector2Time_seconds': 'sector2_time_seconds',
+    'Sector3Time_seconds': 'sector3_time_seconds', 'SpeedI1': 'speed_i1', 'SpeedI2': 'speed_i2',
+    'SpeedFL': 'speed_fl', 'SpeedST': 'speed_st', 'IsPersonalBest': 'is_personal_best',
+    'Compound': 'compound', 'TyreLife': 'tyre_life', 'TrackStatus': 'track_status'
+}
+
+WEATHER_COLUMNS = {
+    'race_id': 'race_id', 'session_type': 'session_type', 'Time': 'time_stamp',
+    'AirTemp': 'air_temp', 'Humidity': 'humidity', 'Pressure': 'pressure', 'Rainfall': 'rainfall',
+    'TrackTemp': 'track_temp', 'WindDirection': 'wind_direction', 'WindSpeed': 'wind_speed'
+}
+
+RESULT_COLUMNS = {
+    'race_id': 'race_id', 'Abbreviation': 'driver_code', 'DriverNumber': 'driver_number',
+    'Position': 'position', 'Points': 'points', 'GridPosition': 'grid_position',
+    'race_time_seconds': 'race_time_seconds', 'Status': 'status', 'TeamName': 'team_name'
+}
+
+def chunked_rows(df, chunk_size=CHUNK_SIZE):
+    """ yield a frame's rows as bindable tuples, converting one chunk at a time """
+    for start in range(0, len(df), chunk_size):
+        yield bindable_rows(df.iloc[start:start + chunk_size])
+
+def insert_frame(conn, table_name, df, column_map):
+    """ insert the mapped columns of a frame chunk by chunk, returning the row count """
+    columns = [col for col in column_map if col in df.columns]
+    subset = df[columns]
+    
+    placeholders = ','.join('?' * len(columns))
+    target_columns = ','.join(column_map[col] for col in columns)
+    sql = f"INSERT INTO {table_name} ({target_columns}) VALUES ({placeholders})"
+    for rows in chunked_rows(subset):
+        conn.executemany(sql, rows)
+    return len(subset)
 
 class FastF1Collector:
     """ Collector for F1 Data using FastF1 library """
@@ -21,12 +158,18 @@ class FastF1Collector:
     def __init__(self, db_path='data/f1_database.db', cache_dir='data/fastf1_cache'):
         self.db_path = self._find_db_path(db_path)
         self.cache_dir = cache_dir
+        self.max_workers = 4 # race weekends loaded concurrently
+        self._save_lock = threading.Lock() # one SQLite writer at a time
 
         # create cache directory
         os.makedirs(cache_dir, exist_ok=True)
 
-        # enable fastf1 cache for faster data retrieval
-        fastf1.Cache.enable_cache(cache_dir)
+        # FastF1 and its cache are set up lazily, the first time a session or schedule is loaded
+        self._fastf1_lock = threading.Lock()
+        self._fastf1_ready = False
+
+        self._configure_db()
+        self._ensure_tables()
 
         print(f"Database path set to: {self.db_path}")
         print(f"Cache directory set to: {self.cache_dir}")
@@ -46,28 +189,51 @@ class FastF1Collector:
 
         return db_path
     
+    def _fastf1(self):
+        """ the fastf1 module, with its cache enabled for faster data retrieval """
+        with self._fastf1_lock:
+            fastf1 = _import_fastf1()
+            if not self._fastf1_ready:
+                fastf1.Cache.enable_cache(self.cache_dir)
+                self._fastf1_ready = True
+        return fastf1
+
+    def _configure_db(self):
+        """ switch the database to WAL journaling before any bulk loading """
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(WAL_PRAGMA)
+        conn.close()
+
+    def _ensure_tables(self):
+        """ create the enhanced tables if they don't exist yet """
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript(';\n'.join(_SCHEMA))
+        conn.close()
+
     def get_season_schedule(self, year=2024):
         """ get the race schedule for a season """
         print(f"Fetching schedule for {year} season...")
 
         try: 
-            schedule = fastf1.get_event_schedule(year)
-
-            races_data = []
-            for idx, event in schedule.iterrows():
-                if pd.notna(event['Session5Date']):
-                    race_data = {
-                        'race_id': f"{year}_{event['RoundNumber']}",
-                        'year': year,
-                        'round': event['RoundNumber'],
-                        'name': event['EventName'],
-                        'date': event['Session5Date'].strftime('%Y-%m-%d'),
-                        'time': event['Session5Time'].strftime('%H:%M:%S'),
-                        'country': event['Country'],
-                        'location': event['Location'],
-                        'circuit_name': event['CircuitName']
-                    }
-                    races_data.append(race_data)
+            schedule = self._fastf1().get_event_schedule(year)
+
+            # Events with a fifth session (the race), built column-wise rather than per row
+            events = schedule.loc[schedule['Session5Date'].notna()]
+            races_data = pd.DataFrame({
+                'race_id': f"{year}_" + events['RoundNumber'].astype(str),
+                'year': year,
+                'round': events['RoundNumber'],
+                'name': events['EventName'],
+                'date': events['Session5Date'].dt.strftime('%Y-%m-%d'),
+                'time': events['Session5Time'].dt.strftime('%H:%M:%S'),
+                'country': events['Country'],
+                'location': events['Location'],
+                'circuit_name': events['CircuitName']
+            }).to_dict('records')
 
             print(f"Found {len(races_data)} races for {year}")
             return races_data
@@ -84,7 +250,7 @@ class FastF1Collector:
         print(f"Loading {year} Round {round_number} {session_type} session...")
         
         try:
-            session = fastf1.get_session(year, round_number, session_type)
+            session = self._fastf1().get_session(year, round_number, session_type)
             session.load(laps=True, telemetry=False, weather=True)
             
             return session
@@ -94,89 +260,151 @@ class FastF1Collector:
             return None
         
 
+    def _tag_frame(self, df, session, include_session_type=False, **columns):
+        """Add race identifiers, read once from the session, and any extra columns in one assign"""
+        year = session.event.year
+        round_number = session.event.RoundNumber
+        tags = {'race_year': year, 'race_round': round_number, 'race_id': f"{year}_{round_number}"}
+        if include_session_type:
+            tags['session_type'] = session.name
+        return df.assign(**tags, **columns)
+
     def extract_lap_data(self, session):
         """Extract detailed lap data from session"""
-        if session is None:
-            return pd.DataFrame()
-        
         try:
-            laps = session.laps
-            
-            if laps.empty:
-                return pd.DataFrame()
-            
-            # Add race information
-            laps['race_year'] = session.event.year
-            laps['race_round'] = session.event.RoundNumber
-            laps['race_id'] = f"{session.event.year}_{session.event.RoundNumber}"
-            laps['session_type'] = session.name
-            
-            # Convert time columns to total seconds for easier analysis
-            time_columns = ['LapTime', 'Sector1Time', 'Sector2Time', 'Sector3Time']
-            for col in time_columns:
-                if col in laps.columns:
-                    laps[f'{col}_seconds'] = laps[col].dt.total_seconds()
-            
-            # Clean up driver names and add identifiers
-            laps['driver_code'] = laps['Driver']
-            laps['driver_number'] = laps['DriverNumber']
-            
-            return laps
-            
+            return self._extract_lap_data(session)
         except Exception as e:
             print(f"Error extracting lap data: {e}")
             return pd.DataFrame()
-        
 
     def extract_race_results(self, session):
         """Extract race results from session"""
-        if session is None:
-            return pd.DataFrame()
-        
         try:
-            results = session.results
-            
-            if results.empty:
-                return pd.DataFrame()
-            
-            # Add race information
-            results['race_year'] = session.event.year
-            results['race_round'] = session.event.RoundNumber
-            results['race_id'] = f"{session.event.year}_{session.event.RoundNumber}"
-            
-            # Convert time to seconds
-            if 'Time' in results.columns:
-                results['race_time_seconds'] = results['Time'].dt.total_seconds()
-            
-            return results
-            
+            return self._extract_race_results(session)
         except Exception as e:
             print(f"Error extracting results: {e}")
             return pd.DataFrame()
-    
+
     def extract_weather_data(self, session):
         """Extract weather data from session"""
+        try:
+            return self._extract_weather_data(session)
+        except Exception as e:
+            print(f"Error extracting weather: {e}")
+            return pd.DataFrame()
+
+    def _extract_lap_data(self, session):
+        """Extract detailed lap data from session, raising on failure"""
+        if session is None:
+            return pd.DataFrame()
+        
+        laps = _project(session.laps, _WANTED_LAP_COLS)
+        
+        if laps.empty:
+            return pd.DataFrame()
+        
+        # Convert time columns to total seconds in one array operation (NaT becomes NaN)
+        time_columns = [col for col in ['LapTime', 'Sector1Time', 'Sector2Time', 'Sector3Time'] if col in laps.columns]
+        seconds = laps[time_columns].to_numpy(dtype='timedelta64[ns]') / np.timedelta64(1, 's')
+        new_columns = {f'{col}_seconds': seconds[:, i] for i, col in enumerate(time_columns)}
+        
+        # Speed traps are whole km/h values and counters are small, so narrower dtypes hold them exactly
+        for col in ['SpeedI1', 'SpeedI2', 'SpeedFL', 'SpeedST']:
+            if col in laps.columns:
+                new_columns[col] = pd.to_numeric(laps[col], downcast='float')
+        for col in ['LapNumber', 'TyreLife']:
+            if col in laps.columns:
+                new_columns[col] = pd.to_numeric(laps[col], downcast='integer')
+        
+        # Add race information and driver identifiers in a single assign
+        return self._tag_frame(
+            laps, session, include_session_type=True,
+            driver_code=laps['Driver'],
+            driver_number=pd.to_numeric(laps['DriverNumber'], downcast='integer'),
+            **new_columns
+        )
+
+    def _extract_race_results(self, session):
+        """Extract race results from session, raising on failure"""
+        if session is None:
+            return pd.DataFrame()
+        
+        results = _project(session.results, _WANTED_RESULT_COLS)
+        
+        if results.empty:
+            return pd.DataFrame()
+        
+        # Convert time to seconds
+        new_columns = {}
+        if 'Time' in results.columns:
+            new_columns['race_time_seconds'] = results['Time'].dt.total_seconds()
+        
+        # Add race information
+        return self._tag_frame(results, session, **new_columns)
+
+    def _extract_weather_data(self, session):
+        """Extract weather data from session, raising on failure"""
         if session is None:
             return pd.DataFrame()
         
+        weather = _project(session.weather_data, _WANTED_WEATHER_COLS)
+        
+        if weather.empty:
+            return pd.DataFrame()
+        
+        # Add race information
+        return self._tag_frame(weather, session, include_session_type=True)
+
+    def load_session_frames(self, year, round_number, session_type):
+        """
+        Get the extracted results, laps and weather for a session
+        Frames are cached as Parquet under cache_dir/processed, so reruns skip FastF1 entirely
+        Nothing is cached when an extraction fails or the results or laps are empty (not
+        published yet), so those sessions are fetched again on the next run
+        """
+        processed_dir = os.path.join(self.cache_dir, 'processed')
+        paths = {
+            kind: os.path.join(processed_dir, f"{year}_{round_number}_{session_type}_{kind}.parquet")
+            for kind in ('results', 'laps', 'weather')
+        }
+        
+        if all(os.path.exists(path) for path in paths.values()):
+            return {kind: pd.read_parquet(path) for kind, path in paths.items()}
+        
+        session = self.get_session_data(year, round_number, session_type)
+        if not session:
+            return None
+        
+        extractors = {
+            'results': self._extract_race_results,
+            'laps': self._extract_lap_data,
+            'weather': self._extract_weather_data
+        }
+        frames = {}
+        complete = True
+        for kind, extract in extractors.items():
+            try:
+                frames[kind] = extract(session)
+            except Exception as e:
+                print(f"Error extracting {kind}: {e}")
+                frames[kind] = pd.DataFrame()
+                complete = False
+        
+        if not complete or frames['results'].empty or frames['laps'].empty:
+            return frames
+        
         try:
-            weather = session.weather_data
-            
-            if weather.empty:
-                return pd.DataFrame()
-            
-            # Add race information
-            weather['race_year'] = session.event.year
-            weather['race_round'] = session.event.RoundNumber
-            weather['race_id'] = f"{session.event.year}_{session.event.RoundNumber}"
-            weather['session_type'] = session.name
-            
-            return weather
-            
+            os.makedirs(processed_dir, exist_ok=True)
+            for kind, path in paths.items():
+                # write to a temp file and rename, so an interrupted write never leaves a truncated cache file
+                tmp_path = f"{path}.tmp"
+                frames[kind].to_parquet(tmp_path, compression='zstd')
+                os.replace(tmp_path, path)
         except Exception as e:
-            print(f"Error extracting weather: {e}")
-            return pd.DataFrame()
+            print(f"Error caching processed frames for {year} Round {round_number} {session_type}: {e}")
         
+        return frames
+    
     def collect_race_weekend_data(self, year, round_number):
         """Collect comprehensive data for a race weekend"""
         print(f"\nCollecting data for {year} Round {round_number}")
@@ -189,139 +417,78 @@ class FastF1Collector:
             'weather': pd.DataFrame()
         }
         
-        # Get race session
-        race_session = self.get_session_data(year, round_number, 'R')
-        if race_session:
-            weekend_data['race_results'] = self.extract_race_results(race_session)
-            weekend_data['race_laps'] = self.extract_lap_data(race_session)
-            race_weather = self.extract_weather_data(race_session)
-            if not race_weather.empty:
-                weekend_data['weather'] = race_weather
-        
-        # Get qualifying session
-        quali_session = self.get_session_data(year, round_number, 'Q')
-        if quali_session:
-            weekend_data['qualifying_results'] = self.extract_race_results(quali_session)
-            weekend_data['qualifying_laps'] = self.extract_lap_data(quali_session)
-            quali_weather = self.extract_weather_data(quali_session)
-            if not quali_weather.empty and weekend_data['weather'].empty:
-                weekend_data['weather'] = quali_weather
+        # Load race and qualifying sessions concurrently
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            race_future = pool.submit(self.load_session_frames, year, round_number, 'R')
+            quali_future = pool.submit(self.load_session_frames, year, round_number, 'Q')
+            race_frames = race_future.result()
+            quali_frames = quali_future.result()
+        
+        if race_frames:
+            weekend_data['race_results'] = race_frames['results']
+            weekend_data['race_laps'] = race_frames['laps']
+            if not race_frames['weather'].empty:
+                weekend_data['weather'] = race_frames['weather']
+        
+        if quali_frames:
+            weekend_data['qualifying_results'] = quali_frames['results']
+            weekend_data['qualifying_laps'] = quali_frames['laps']
+            if not quali_frames['weather'].empty and weekend_data['weather'].empty:
+                weekend_data['weather'] = quali_frames['weather']
         
         return weekend_data
     
     def save_enhanced_data(self, weekend_data):
-        """Save enhanced data to new tables"""
-        conn = sqlite3.connect(self.db_path)
+        """Save enhanced data to new tables in a single transaction"""
+        # autocommit mode so the explicit BEGIN/COMMIT below spans all three tables
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        conn.executescript(CONNECTION_PRAGMAS)
         
         try:
+            conn.execute("BEGIN")
+            
             # Save lap times data
             if not weekend_data['race_laps'].empty:
-                laps_df = weekend_data['race_laps'].copy()
-                
-                # Select relevant columns for database
-                lap_columns = [
-                    'race_id', 'driver_code', 'driver_number', 'LapNumber', 
-                    'LapTime_seconds', 'Sector1Time_seconds', 'Sector2Time_seconds', 
-                    'Sector3Time_seconds', 'SpeedI1', 'SpeedI2', 'SpeedFL', 'SpeedST',
-                    'IsPersonalBest', 'Compound', 'TyreLife', 'TrackStatus'
-                ]
-                
-                # Only keep columns that exist
-                available_columns = [col for col in lap_columns if col in laps_df.columns]
-                laps_subset = laps_df[available_columns]
-                
-                # Create enhanced lap times table if it doesn't exist
-                conn.execute("""
-                CREATE TABLE IF NOT EXISTS enhanced_lap_times (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    race_id TEXT,
-                    driver_code TEXT,
-                    driver_number INTEGER,
-                    lap_number INTEGER,
-                    lap_time_seconds REAL,
-                    sector1_time_seconds REAL,
-                    sector2_time_seconds REAL,
-                    sector3_time_seconds REAL,
-                    speed_i1 REAL,
-                    speed_i2 REAL,
-                    speed_fl REAL,
-                    speed_st REAL,
-                    is_personal_best BOOLEAN,
-                    compound TEXT,
-                    tyre_life INTEGER,
-                    track_status TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-                """)
-                
-                # Save data
-                laps_subset.to_sql('enhanced_lap_times', conn, if_exists='append', index=False)
-                print(f"Saved {len(laps_subset)} lap records")
+                saved = insert_frame(conn, 'enhanced_lap_times', weekend_data['race_laps'], LAP_COLUMNS)
+                print(f"Saved {saved} lap records")
             
             # Save weather data
             if not weekend_data['weather'].empty:
                 weather_df = weekend_data['weather'].copy()
+                # Session-relative timestamps are stored as text
+                if 'Time' in weather_df.columns:
+                    weather_df['Time'] = weather_df['Time'].astype(str)
                 
-                # Create weather table if it doesn't exist
-                conn.execute("""
-                CREATE TABLE IF NOT EXISTS enhanced_weather (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    race_id TEXT,
-                    session_type TEXT,
-                    time_stamp TEXT,
-                    air_temp REAL,
-                    humidity REAL,
-                    pressure REAL,
-                    rainfall REAL,
-                    track_temp REAL,
-                    wind_direction REAL,
-                    wind_speed REAL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-                """)
-                
-                weather_df.to_sql('enhanced_weather', conn, if_exists='append', index=False)
-                print(f"Saved {len(weather_df)} weather records")
+                saved = insert_frame(conn, 'enhanced_weather', weather_df, WEATHER_COLUMNS)
+                print(f"Saved {saved} weather records")
             
             # Save enhanced race results
             if not weekend_data['race_results'].empty:
-                results_df = weekend_data['race_results'].copy()
-                
-                # Create enhanced results table
-                conn.execute("""
-                CREATE TABLE IF NOT EXISTS enhanced_race_results (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    race_id TEXT,
-                    driver_code TEXT,
-                    driver_number INTEGER,
-                    position INTEGER,
-                    points REAL,
-                    grid_position INTEGER,
-                    race_time_seconds REAL,
-                    status TEXT,
-                    team_name TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-                """)
-                
-                # Select relevant columns
-                result_columns = [
-                    'race_id', 'Abbreviation', 'DriverNumber', 'Position', 
-                    'Points', 'GridPosition', 'race_time_seconds', 'Status', 'TeamName'
-                ]
-                available_result_columns = [col for col in result_columns if col in results_df.columns]
-                results_subset = results_df[available_result_columns]
-                
-                results_subset.to_sql('enhanced_race_results', conn, if_exists='append', index=False)
-                print(f"Saved {len(results_subset)} race results")
+                saved = insert_frame(conn, 'enhanced_race_results', weekend_data['race_results'], RESULT_COLUMNS)
+                print(f"Saved {saved} race results")
             
-            conn.commit()
+            conn.execute("COMMIT")
             
         except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
             print(f"Error saving data: {e}")
         finally:
             conn.close()
     
+    def _process_race(self, year, race):
+        """Collect one race weekend and save it, serializing the database writes"""
+        print(f"\n--- Processing {race['name']} ---")
+        
+        weekend_data = self.collect_race_weekend_data(year, race['round'])
+        
+        if any(not df.empty for df in weekend_data.values()):
+            with self._save_lock:
+                self.save_enhanced_data(weekend_data)
+            print(f"Completed {race['name']}")
+        else:
+            print(f"No data available for {race['name']}")
+    
     def collect_recent_season_data(self, year=2024, max_rounds=5):
         """Collect data for recent races"""
         print(f"Starting comprehensive data collection for {year}")
@@ -345,19 +512,9 @@ class FastF1Collector:
         
         print(f"Found {len(completed_races)} completed races to process")
         
-        for i, race in enumerate(completed_races, 1):
-            print(f"\n--- Processing Race {i}/{len(completed_races)}: {race['name']} ---")
-            
-            weekend_data = self.collect_race_weekend_data(year, race['round'])
-            
-            if any(not df.empty for df in weekend_data.values()):
-                self.save_enhanced_data(weekend_data)
-                print(f"Completed {race['name']}")
-            else:
-                print(f"No data available for {race['name']}")
-            
-            # Small delay to be respectful
-            time.sleep(1)
+        # Weekends load in parallel; FastF1 retries rate-limited requests itself
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            list(pool.map(lambda race: self._process_race(year, race), completed_races))
         
         print(f"\nData collection complete! Collected data for {len(completed_races)} races")
 
@@ -8,6 +8,27 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import os
+import threading
+from functools import wraps
+
+def cached_by_db_mtime(method):
+    """
+    Memoize a query method per argument tuple until the database changes on disk
+    Cached results are shared between callers, so they must not be modified in place
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        mtime = self._db_mtime()
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        result = method(self, *args, **kwargs)
+        self._cache[key] = (mtime, result)
+        return result
+    
+    return wrapper
 
 class F1Analytics:
     """Advanced F1 analytics class"""
@@ -31,13 +52,58 @@ class F1Analytics:
             raise FileNotFoundError(f"Database not found at {self.db_path}")
         
         print(f"📁 Using database: {self.db_path}")
+        
+        self._cache = {}
+        
+        # One connection reused by every query; the dashboard shares this object across threads
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+    
+    def close(self):
+        """Close the database connection"""
+        self._conn.close()
     
+    def _query(self, query, params=()):
+        """Run a query on the shared connection and build a DataFrame straight from the fetched rows"""
+        with self._lock:
+            cursor = self._conn.execute(query, params)
+            columns = [d[0] for d in cursor.description]
+            rows = cursor.fetchall()
+        return pd.DataFrame.from_records(rows, columns=columns)
+    
+    def _query_one(self, query, params=()):
+        """Run a single-row query on the shared connection and return it as a dict"""
+        with self._lock:
+            cursor = self._conn.execute(query, params)
+            columns = [d[0] for d in cursor.description]
+            return dict(zip(columns, cursor.fetchone()))
+    
+    def _db_mtime(self):
+        """Latest modification time of the database, including an uncheckpointed WAL file"""
+        wal_path = self.db_path + '-wal'
+        mtime = os.path.getmtime(self.db_path)
+        if os.path.exists(wal_path):
+            mtime = max(mtime, os.path.getmtime(wal_path))
+        return mtime
+    
+    @cached_by_db_mtime
     def get_driver_performance_metrics(self):
         """Calculate comprehensive driver performance metrics"""
         
-        conn = sqlite3.connect(self.db_path)
-        
+        # Consistency is per driver across all teams, so it is aggregated separately from the
+        # (driver, constructor) groups; the CTE is a single pass over idx_rr_driver_cover
         query = """
+        WITH consistency AS (
+            SELECT
+                driver_id,
+                -- Population standard deviation of finishing position, E[x^2] - E[x]^2
+                ROUND(
+                    SQRT(MAX(AVG(position * position) - AVG(position) * AVG(position), 0)), 2
+                ) as position_consistency
+            FROM race_results
+            WHERE position IS NOT NULL
+            GROUP BY driver_id
+        )
         SELECT 
             d.driver_id,
             d.forename || ' ' || d.surname as driver_name,
@@ -55,53 +121,34 @@ class F1Analytics:
             SUM(CASE WHEN rr.position <= 10 THEN 1 ELSE 0 END) as points_finishes,
             AVG(rr.grid) as avg_grid_position,
             (AVG(rr.grid) - AVG(rr.position)) as avg_grid_gain,
-            COUNT(rr.fastest_lap) as fastest_laps
+            COUNT(rr.fastest_lap) as fastest_laps,
+            cons.position_consistency
         FROM race_results rr
         JOIN drivers d ON rr.driver_id = d.driver_id
         JOIN constructors c ON rr.constructor_id = c.constructor_id
+        JOIN consistency cons ON cons.driver_id = d.driver_id
         WHERE rr.position IS NOT NULL
-        GROUP BY d.driver_id, d.forename, d.surname, d.code, d.nationality, c.name
+        GROUP BY d.driver_id, d.forename, d.surname, d.code, d.nationality, c.name, cons.position_consistency
         ORDER BY total_points DESC
         """
         
-        df = pd.read_sql_query(query, conn)
+        df = self._query(query)
         
-        # Calculate additional metrics
-        df['podium_rate'] = df['podiums'] / df['races_completed'] * 100
-        df['points_rate'] = df['points_finishes'] / df['races_completed'] * 100
-        df['win_rate'] = df['wins'] / df['races_completed'] * 100
-        
-        # Performance consistency (standard deviation of positions)
-        consistency_query = """
-        SELECT 
-            driver_id,
-            ROUND(
-                SQRT(
-                    SUM((position - avg_pos) * (position - avg_pos)) / COUNT(*)
-                ), 2
-            ) as position_consistency
-        FROM (
-            SELECT 
-                driver_id,
-                position,
-                AVG(position) OVER (PARTITION BY driver_id) as avg_pos
-            FROM race_results 
-            WHERE position IS NOT NULL
+        # Calculate additional metrics, as percentages of races completed
+        races = df['races_completed'].to_numpy()
+        scale = 100.0 / np.where(races > 0, races, 1)
+        df = df.assign(
+            podium_rate=df['podiums'].to_numpy() * scale,
+            points_rate=df['points_finishes'].to_numpy() * scale,
+            win_rate=df['wins'].to_numpy() * scale
         )
-        GROUP BY driver_id
-        """
-        
-        consistency_df = pd.read_sql_query(consistency_query, conn)
-        df = df.merge(consistency_df, on='driver_id', how='left')
         
-        conn.close()
         return df
     
+    @cached_by_db_mtime
     def get_constructor_performance(self):
         """Analyze constructor/team performance"""
         
-        conn = sqlite3.connect(self.db_path)
-        
         query = """
         SELECT 
             c.constructor_id,
@@ -123,21 +170,58 @@ class F1Analytics:
         ORDER BY total_points DESC
         """
         
-        df = pd.read_sql_query(query, conn)
+        df = self._query(query)
+        
+        # Calculate rates, as percentages of entries
+        entries = df['total_entries'].to_numpy()
+        scale = 100.0 / np.where(entries > 0, entries, 1)
+        df = df.assign(
+            podium_rate=df['podiums'].to_numpy() * scale,
+            points_rate=df['points_finishes'].to_numpy() * scale,
+            win_rate=df['wins'].to_numpy() * scale
+        )
+        
+        return df
+    
+    @cached_by_db_mtime
+    def get_overview_kpis(self):
+        """Headline season counts computed in a single aggregate query"""
+        
+        query = """
+        SELECT 
+            COUNT(DISTINCT driver_id) as total_drivers,
+            COUNT(DISTINCT constructor_id) as total_constructors,
+            COUNT(DISTINCT race_id) as races_completed,
+            SUM(CASE WHEN position = 1 THEN 1 ELSE 0 END) as total_wins
+        FROM race_results
+        WHERE position IS NOT NULL
+        """
+        
+        return self._query_one(query)
+    
+    @cached_by_db_mtime
+    def get_top_drivers(self, n=10):
+        """Top n drivers by total points"""
         
-        # Calculate rates
-        df['podium_rate'] = df['podiums'] / df['total_entries'] * 100
-        df['points_rate'] = df['points_finishes'] / df['total_entries'] * 100
-        df['win_rate'] = df['wins'] / df['total_entries'] * 100
+        query = """
+        SELECT 
+            d.forename || ' ' || d.surname as driver_name,
+            SUM(rr.points) as total_points
+        FROM race_results rr
+        JOIN drivers d ON rr.driver_id = d.driver_id
+        WHERE rr.position IS NOT NULL
+        GROUP BY d.driver_id, d.forename, d.surname
+        ORDER BY total_points DESC
+        LIMIT ?
+        """
         
-        conn.close()
+        df = self._query(query, params=[n])
         return df
     
+    @cached_by_db_mtime
     def get_race_analysis(self):
         """Analyze individual race performance"""
         
-        conn = sqlite3.connect(self.db_path)
-        
         query = """
         SELECT 
             r.race_id,
@@ -164,135 +248,145 @@ class F1Analytics:
         ORDER BY r.date DESC
         """
         
-        df = pd.read_sql_query(query, conn)
-        conn.close()
+        df = self._query(query)
         return df
     
+    @cached_by_db_mtime
     def get_head_to_head_comparison(self, driver1_id, driver2_id):
         """Compare two drivers head-to-head"""
         
-        conn = sqlite3.connect(self.db_path)
+        # Races where both drivers participated
+        h2h_cte = """
+        WITH h2h AS (
+            SELECT 
+                r.name as race_name,
+                r.date,
+                d1.forename || ' ' || d1.surname as driver1_name,
+                rr1.position as driver1_position,
+                rr1.points as driver1_points,
+                d2.forename || ' ' || d2.surname as driver2_name,
+                rr2.position as driver2_position,
+                rr2.points as driver2_points,
+                CASE 
+                    WHEN rr1.position < rr2.position THEN 1
+                    WHEN rr1.position > rr2.position THEN 2
+                    ELSE 0
+                END as winner
+            FROM races r
+            JOIN race_results rr1 ON r.race_id = rr1.race_id AND rr1.driver_id = ?
+            JOIN race_results rr2 ON r.race_id = rr2.race_id AND rr2.driver_id = ?
+            JOIN drivers d1 ON rr1.driver_id = d1.driver_id
+            JOIN drivers d2 ON rr2.driver_id = d2.driver_id
+            WHERE rr1.position IS NOT NULL AND rr2.position IS NOT NULL
+        )
+        """
+        params = [driver1_id, driver2_id]
         
-        # Get races where both drivers participated
-        query = """
+        df = self._query(h2h_cte + "SELECT * FROM h2h ORDER BY date", params)
+        
+        # Head-to-head stats aggregated by SQLite over the same rows
+        stats_query = h2h_cte + """
         SELECT 
-            r.name as race_name,
-            r.date,
-            d1.forename || ' ' || d1.surname as driver1_name,
-            rr1.position as driver1_position,
-            rr1.points as driver1_points,
-            d2.forename || ' ' || d2.surname as driver2_name,
-            rr2.position as driver2_position,
-            rr2.points as driver2_points,
-            CASE 
-                WHEN rr1.position < rr2.position THEN 1
-                WHEN rr1.position > rr2.position THEN 2
-                ELSE 0
-            END as winner
-        FROM races r
-        JOIN race_results rr1 ON r.race_id = rr1.race_id AND rr1.driver_id = ?
-        JOIN race_results rr2 ON r.race_id = rr2.race_id AND rr2.driver_id = ?
-        JOIN drivers d1 ON rr1.driver_id = d1.driver_id
-        JOIN drivers d2 ON rr2.driver_id = d2.driver_id
-        WHERE rr1.position IS NOT NULL AND rr2.position IS NOT NULL
-        ORDER BY r.date
+            COUNT(*) as total_races,
+            SUM(winner = 1) as driver1_wins,
+            SUM(winner = 2) as driver2_wins,
+            SUM(winner = 0) as ties,
+            AVG(driver1_position) as driver1_avg_position,
+            AVG(driver2_position) as driver2_avg_position,
+            SUM(driver1_points) as driver1_total_points,
+            SUM(driver2_points) as driver2_total_points
+        FROM h2h
         """
         
-        df = pd.read_sql_query(query, conn, params=[driver1_id, driver2_id])
+        h2h_stats = self._query_one(stats_query, params) if not df.empty else {}
         
-        # Calculate head-to-head stats
-        if not df.empty:
-            h2h_stats = {
-                'total_races': len(df),
-                'driver1_wins': len(df[df['winner'] == 1]),
-                'driver2_wins': len(df[df['winner'] == 2]),
-                'ties': len(df[df['winner'] == 0]),
-                'driver1_avg_position': df['driver1_position'].mean(),
-                'driver2_avg_position': df['driver2_position'].mean(),
-                'driver1_total_points': df['driver1_points'].sum(),
-                'driver2_total_points': df['driver2_points'].sum()
-            }
-        else:
-            h2h_stats = {}
-        
-        conn.close()
         return df, h2h_stats
     
+    @cached_by_db_mtime
     def get_championship_progression(self):
         """Show championship points progression over races"""
         
-        conn = sqlite3.connect(self.db_path)
-        
         query = """
         SELECT 
             r.round,
             r.name as race_name,
             r.date,
+            d.driver_id,
             d.forename || ' ' || d.surname as driver_name,
-            rr.points as race_points,
-            SUM(rr.points) OVER (
-                PARTITION BY d.driver_id 
-                ORDER BY r.round 
-                ROWS UNBOUNDED PRECEDING
-            ) as cumulative_points
+            rr.points as race_points
         FROM races r
         JOIN race_results rr ON r.race_id = rr.race_id
         JOIN drivers d ON rr.driver_id = d.driver_id
-        ORDER BY r.round, cumulative_points DESC
+        ORDER BY d.driver_id, r.round
         """
         
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        return df
+        df = self._query(query)
+        
+        # Rows arrive in (driver, round) order, so a grouped cumsum gives each driver's running total
+        df['cumulative_points'] = df.groupby('driver_id', sort=False)['race_points'].cumsum()
+        df = df.drop(columns='driver_id').sort_values(
+            ['round', 'cumulative_points'], ascending=[True, False], kind='stable'
+        )
+        return df.reset_index(drop=True)
     
+    @cached_by_db_mtime
     def get_circuit_performance(self):
         """Analyze performance at different circuits"""
         
-        conn = sqlite3.connect(self.db_path)
-        
         query = """
-        SELECT 
-            c.name as circuit_name,
-            c.country,
-            COUNT(rr.race_id) as total_races,
-            AVG(rr.position) as avg_position,
-            d.forename || ' ' || d.surname as most_successful_driver,
-            driver_wins.wins as driver_wins_at_circuit,
-            constructor.name as most_successful_constructor,
-            constructor_wins.wins as constructor_wins_at_circuit
-        FROM circuits c
-        JOIN races r ON c.circuit_id = r.circuit_id
-        JOIN race_results rr ON r.race_id = rr.race_id
-        LEFT JOIN (
-            SELECT 
-                r.circuit_id,
-                rr.driver_id,
-                COUNT(*) as wins,
-                ROW_NUMBER() OVER (PARTITION BY r.circuit_id ORDER BY COUNT(*) DESC) as rn
+        WITH wins AS (
+            -- Every race win, read once and shared by both rankings below
+            SELECT r.circuit_id, rr.driver_id, rr.constructor_id
             FROM races r
             JOIN race_results rr ON r.race_id = rr.race_id
             WHERE rr.position = 1
-            GROUP BY r.circuit_id, rr.driver_id
-        ) driver_wins ON c.circuit_id = driver_wins.circuit_id AND driver_wins.rn = 1
-        LEFT JOIN drivers d ON driver_wins.driver_id = d.driver_id
-        LEFT JOIN (
+        ),
+        driver_top AS (
             SELECT 
-                r.circuit_id,
-                rr.constructor_id,
+                circuit_id,
+                driver_id,
+                COUNT(*) as wins,
+                ROW_NUMBER() OVER (PARTITION BY circuit_id ORDER BY COUNT(*) DESC) as rn
+            FROM wins
+            GROUP BY circuit_id, driver_id
+        ),
+        constructor_top AS (
+            SELECT 
+                circuit_id,
+                constructor_id,
                 COUNT(*) as wins,
-                ROW_NUMBER() OVER (PARTITION BY r.circuit_id ORDER BY COUNT(*) DESC) as rn
+                ROW_NUMBER() OVER (PARTITION BY circuit_id ORDER BY COUNT(*) DESC) as rn
+            FROM wins
+            GROUP BY circuit_id, constructor_id
+        ),
+        circuit_stats AS (
+            SELECT 
+                r.circuit_id,
+                COUNT(rr.race_id) as total_races,
+                AVG(rr.position) as avg_position
             FROM races r
             JOIN race_results rr ON r.race_id = rr.race_id
-            WHERE rr.position = 1
-            GROUP BY r.circuit_id, rr.constructor_id
-        ) constructor_wins ON c.circuit_id = constructor_wins.circuit_id AND constructor_wins.rn = 1
-        LEFT JOIN constructors constructor ON constructor_wins.constructor_id = constructor.constructor_id
-        GROUP BY c.circuit_id, c.name, c.country, d.forename, d.surname, driver_wins.wins, constructor.name, constructor_wins.wins
+            GROUP BY r.circuit_id
+        )
+        SELECT 
+            c.name as circuit_name,
+            c.country,
+            cs.total_races,
+            cs.avg_position,
+            d.forename || ' ' || d.surname as most_successful_driver,
+            driver_top.wins as driver_wins_at_circuit,
+            constructor.name as most_successful_constructor,
+            constructor_top.wins as constructor_wins_at_circuit
+        FROM circuits c
+        JOIN circuit_stats cs ON c.circuit_id = cs.circuit_id
+        LEFT JOIN driver_top ON c.circuit_id = driver_top.circuit_id AND driver_top.rn = 1
+        LEFT JOIN drivers d ON driver_top.driver_id = d.driver_id
+        LEFT JOIN constructor_top ON c.circuit_id = constructor_top.circuit_id AND constructor_top.rn = 1
+        LEFT JOIN constructors constructor ON constructor_top.constructor_id = constructor.constructor_id
         ORDER BY total_races DESC
         """
         
-        df = pd.read_sql_query(query, conn)
-        conn.close()
+        df = self._query(query)
         return df
 
 def main():